@@ -0,0 +1,172 @@
+# 图集装箱算法（MaxRects，最短边优先 BSSF）。
+# 空闲矩形同时登记在一个均匀网格索引中，放置后切分、剔除时只需检查与精灵重叠的网格内的空闲矩形；
+# 另按高度、宽度各维护一个有序列表，查找放置位置时从精灵的高、宽处向上按余量从小到大检查，
+# 余量超过当前最优的剩余短边即可停止，不必遍历全部空闲矩形，使数千个精灵的装箱仍保持较快速度。
+
+from bisect import bisect_left, insort
+
+def next_power_of_two(n):
+    return 1 << max(0, n - 1).bit_length()
+
+def prev_power_of_two(n):
+    # 不超过 n 的最大 2 的幂
+    return 1 << (max(1, n).bit_length() - 1)
+
+def _intersects(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+def _contains(a, b):
+    # a 是否完全包含 b
+    return a[0] <= b[0] and a[1] <= b[1] and a[0] + a[2] >= b[0] + b[2] and a[1] + a[3] >= b[1] + b[3]
+
+class MaxRectsBin:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cell = max(64, max(width, height) // 32)
+        self.free = {}  # 编号 -> (x, y, w, h)
+        self.grid = {}  # (网格列, 网格行) -> 空闲矩形编号集合
+        self.by_h = []  # (高, 编号)，按高度排序
+        self.by_w = []  # (宽, 编号)，按宽度排序
+        self.next_id = 0
+        self._add_free((0, 0, width, height))
+
+    def _cells(self, rect):
+        x, y, w, h = rect
+        for gx in range(x // self.cell, (x + w - 1) // self.cell + 1):
+            for gy in range(y // self.cell, (y + h - 1) // self.cell + 1):
+                yield gx, gy
+
+    def _add_free(self, rect):
+        fid = self.next_id
+        self.next_id += 1
+        self.free[fid] = rect
+        for key in self._cells(rect):
+            self.grid.setdefault(key, set()).add(fid)
+        insort(self.by_h, (rect[3], fid))
+        insort(self.by_w, (rect[2], fid))
+
+    def _remove_free(self, fid):
+        rect = self.free.pop(fid)
+        for key in self._cells(rect):
+            bucket = self.grid[key]
+            bucket.discard(fid)
+            if not bucket:
+                del self.grid[key]
+        del self.by_h[bisect_left(self.by_h, (rect[3], fid))]
+        del self.by_w[bisect_left(self.by_w, (rect[2], fid))]
+
+    def _nearby(self, rect):
+        found = set()
+        for key in self._cells(rect):
+            found.update(self.grid.get(key, ()))
+        return found
+
+    def find(self, w, h):
+        # 最短边优先：选择放入后剩余短边最小的空闲矩形，返回 (x, y) 或 None
+        # 剩余短边为 s 的矩形，其高度余量或宽度余量必有一个等于 s。两个列表从 h、w 处开始按余量合并遍历，
+        # 余量超过当前最优的剩余短边后，未检查的矩形剩余短边都更大
+        by_h, by_w = self.by_h, self.by_w
+        ih, iw = bisect_left(by_h, (h, -1)), bisect_left(by_w, (w, -1))
+        best = None
+        best_score = None
+        while ih < len(by_h) or iw < len(by_w):
+            dh = by_h[ih][0] - h if ih < len(by_h) else None
+            dw = by_w[iw][0] - w if iw < len(by_w) else None
+            if dw is None or (dh is not None and dh <= dw):
+                slack, fid = dh, by_h[ih][1]
+                ih += 1
+            else:
+                slack, fid = dw, by_w[iw][1]
+                iw += 1
+            if best_score is not None and slack > best_score[0]:
+                break
+            x, y, fw, fh = self.free[fid]
+            if fw >= w and fh >= h:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h), y, x)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (x, y)
+        return best
+
+    def insert(self, w, h):
+        pos = self.find(w, h)
+        if pos is None:
+            return None
+        placed = (pos[0], pos[1], w, h)
+        new_rects = []
+        for fid in self._nearby(placed):
+            free = self.free[fid]
+            if not _intersects(free, placed):
+                continue
+            self._remove_free(fid)
+            new_rects.extend(self._split(free, placed))
+        # 剔除被其他空闲矩形包含的矩形，只需检查索引中相邻的矩形
+        kept = []
+        for rect in new_rects:
+            if any(_contains(other, rect) for other in kept):
+                continue
+            kept = [other for other in kept if not _contains(rect, other)]
+            kept.append(rect)
+        for rect in kept:
+            if any(_contains(self.free[fid], rect) for fid in self._nearby(rect)):
+                continue
+            for fid in list(self._nearby(rect)):
+                if _contains(rect, self.free[fid]):
+                    self._remove_free(fid)
+            self._add_free(rect)
+        return pos
+
+    @staticmethod
+    def _split(free, placed):
+        fx, fy, fw, fh = free
+        px, py, pw, ph = placed
+        parts = []
+        if px > fx:
+            parts.append((fx, fy, px - fx, fh))
+        if px + pw < fx + fw:
+            parts.append((px + pw, fy, fx + fw - px - pw, fh))
+        if py > fy:
+            parts.append((fx, fy, fw, py - fy))
+        if py + ph < fy + fh:
+            parts.append((fx, py + ph, fw, fy + fh - py - ph))
+        return parts
+
+def pack_sprites(sizes, max_size=2048, padding=2, power_of_two=False):
+    """把 {名称: (宽, 高)} 装入若干张不超过 max_size 的图集页。
+    返回 (pages, oversized)：pages 为 [{"width", "height", "sprites": {名称: (x, y, w, h)}}]，
+    oversized 为单张就超过图集尺寸、无法放入的精灵名称列表。
+    power_of_two 时按不超过 max_size 的最大 2 的幂装箱，向上取整后的页面尺寸也不会超过 max_size"""
+    if power_of_two:
+        max_size = prev_power_of_two(max_size)
+    bins = []
+    placements = []
+    oversized = []
+    # 先放大块：按长边、面积降序
+    order = sorted(sizes.items(), key=lambda item: (max(item[1]), item[1][0] * item[1][1]), reverse=True)
+    for name, (w, h) in order:
+        pw, ph = w + padding, h + padding
+        if w > max_size or h > max_size:
+            oversized.append(name)
+            continue
+        # 紧贴图集右/下边缘时无需额外间距
+        pw, ph = min(pw, max_size), min(ph, max_size)
+        for page, packer in enumerate(bins):
+            pos = packer.insert(pw, ph)
+            if pos is not None:
+                break
+        else:
+            packer = MaxRectsBin(max_size, max_size)
+            bins.append(packer)
+            placements.append({})
+            page = len(bins) - 1
+            pos = packer.insert(pw, ph)
+        placements[page][name] = (pos[0], pos[1], w, h)
+    pages = []
+    for packer, sprites in zip(bins, placements):
+        width = max(x + w for x, y, w, h in sprites.values())
+        height = max(y + h for x, y, w, h in sprites.values())
+        if power_of_two:
+            width, height = next_power_of_two(width), next_power_of_two(height)
+        pages.append({"width": width, "height": height, "sprites": sprites})
+    return pages, oversized
@@ -0,0 +1,70 @@
+import io
+import math
+import os
+import sys
+import time
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageStat
+
+from resizing import resize_image, apply_draft, FILE_EXTS
+
+# 对比“质量优先”（全尺寸解码 + 单次重采样）与“速度优先”（JPEG 缩小解码 + reduce + 末段重采样）
+# 的耗时与输出差异。用法：python bench_resize.py [图片目录] [目标宽] [目标高]
+# 不指定目录时自动生成若干张 4000x3000 的测试 JPEG。
+
+def make_samples(count=6, size=(4000, 3000)):
+    samples = []
+    for i in range(count):
+        img = Image.merge("RGB", (
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+            Image.linear_gradient("L").rotate(90 + i * 15).resize(size),
+        ))
+        draw = ImageDraw.Draw(img)
+        for k in range(40):
+            x, y = (k * 997 + i * 131) % size[0], (k * 577 + i * 53) % size[1]
+            draw.ellipse((x, y, x + 300, y + 200), fill=((k * 37) % 256, (k * 91) % 256, (k * 53) % 256))
+        img = Image.blend(img, Image.effect_noise(size, 40).convert("RGB"), 0.15).filter(ImageFilter.SMOOTH)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=92)
+        samples.append((f"sample_{i + 1}.jpg", buf.getvalue()))
+    return samples
+
+def load_folder(folder):
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(FILE_EXTS):
+            with open(os.path.join(folder, name), "rb") as f:
+                samples.append((name, f.read()))
+    return samples
+
+def run(data, target_w, target_h, fast):
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as img:
+        if fast:
+            apply_draft(img, target_w, target_h, True)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        result = resize_image(img, target_w, target_h, True, (255, 255, 255), Image.LANCZOS, fast)
+    return result, time.perf_counter() - start
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else None
+    target_w = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    target_h = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    samples = load_folder(folder) if folder else make_samples()
+    total_quality = total_fast = 0.0
+    print(f"{'文件':<24}{'质量优先(s)':>12}{'速度优先(s)':>12}{'加速比':>8}{'平均误差':>10}{'PSNR(dB)':>10}")
+    for name, data in samples:
+        quality_img, quality_time = run(data, target_w, target_h, False)
+        fast_img, fast_time = run(data, target_w, target_h, True)
+        diff = ImageStat.Stat(ImageChops.difference(quality_img, fast_img))
+        mae = sum(diff.mean) / len(diff.mean)
+        mse = sum(diff.rms[i] ** 2 for i in range(len(diff.rms))) / len(diff.rms)
+        psnr = float("inf") if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+        total_quality += quality_time
+        total_fast += fast_time
+        print(f"{name:<24}{quality_time:>12.3f}{fast_time:>12.3f}{quality_time / fast_time:>8.1f}{mae:>10.2f}{psnr:>10.1f}")
+    print(f"合计：质量优先 {total_quality:.2f}s，速度优先 {total_fast:.2f}s，加速 {total_quality / total_fast:.1f} 倍")
+
+if __name__ == "__main__":
+    main()
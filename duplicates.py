@@ -0,0 +1,85 @@
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# 完全相同文件的查找：先按文件大小分组，大小相同的再比较首尾各 64 KB 的哈希，
+# 只有这两步都相同的文件才读取全文计算哈希。大多数文件在前两步就被排除，
+# 实际读取的数据量只占全部文件的很小一部分。
+
+HASH_WORKERS = 8
+PARTIAL_SIZE = 64 << 10
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 10000
+
+def file_hash(path, size, partial=False):
+    """返回 (哈希, 读取字节数)。partial 为 True 且文件大于两倍 PARTIAL_SIZE 时只读取首尾各 PARTIAL_SIZE 字节"""
+    h = hashlib.blake2b(digest_size=16)
+    read = 0
+    with open(path, "rb") as f:
+        if partial and size > 2 * PARTIAL_SIZE:
+            head = f.read(PARTIAL_SIZE)
+            f.seek(size - PARTIAL_SIZE)
+            tail = f.read(PARTIAL_SIZE)
+            h.update(head)
+            h.update(tail)
+            return h.digest(), len(head) + len(tail)
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+            read += len(chunk)
+    return h.digest(), read
+
+def _regroup(pool, groups, partial, errors):
+    # 对每组内的文件计算哈希并按哈希细分，丢弃细分后只剩一个文件的组，返回 (新分组列表, 读取字节数)
+    jobs = [(key, item) for key, items in groups for item in items]
+    refined = defaultdict(list)
+    read = 0
+    # 分批提交，候选很多时不会一次创建上百万个任务
+    for start in range(0, len(jobs), BATCH_SIZE):
+        batch = jobs[start:start + BATCH_SIZE]
+        for (key, item), (digest, nbytes, err) in zip(batch, pool.map(_try_hash, (item for _, item in batch), [partial] * len(batch))):
+            read += nbytes
+            if err is not None:
+                errors.append((item[0], err))
+                continue
+            refined[(key, digest)].append(item)
+    return [(key, items) for key, items in refined.items() if len(items) > 1], read
+
+def _try_hash(item, partial):
+    try:
+        return (*file_hash(item[0], item[1], partial), None)
+    except OSError as e:
+        return None, 0, e
+
+def find_duplicates(files, workers=HASH_WORKERS, progress=None):
+    """files 为 (路径, 大小, 修改时间) 的可迭代对象，返回 (重复组列表, 读取失败列表)。
+    每个重复组为内容完全相同的 (路径, 大小, 修改时间) 列表；空文件不参与比较。
+    progress(消息) 用于回报各阶段的候选数量和读取的数据量"""
+    by_size = defaultdict(list)
+    total = total_bytes = 0
+    for item in files:
+        total += 1
+        total_bytes += item[1]
+        if item[1] > 0:
+            by_size[item[1]].append(item)
+    groups = [(size, items) for size, items in by_size.items() if len(items) > 1]
+    errors = []
+    if progress:
+        candidates = sum(len(items) for _, items in groups)
+        progress(f"共 {total} 个文件（{total_bytes / 1048576:.1f} MB），大小相同的候选 {candidates} 个")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        groups, partial_read = _regroup(pool, groups, True, errors)
+        # 不超过两倍 PARTIAL_SIZE 的文件在上一步已读取全文，无需再比较
+        done = [(key, items) for key, items in groups if key[0] <= 2 * PARTIAL_SIZE]
+        pending = [(key, items) for key, items in groups if key[0] > 2 * PARTIAL_SIZE]
+        if progress:
+            progress(f"首尾哈希后剩余候选 {sum(len(items) for _, items in groups)} 个，读取 {partial_read / 1048576:.1f} MB")
+        # 进入完整哈希的文件首尾部分已在上一步读过，统计占比时不重复计算
+        reread = sum(len(items) for _, items in pending) * 2 * PARTIAL_SIZE
+        pending, full_read = _regroup(pool, pending, False, errors)
+    if progress:
+        progress(f"完整哈希读取 {full_read / 1048576:.1f} MB，共读取全部数据的 "
+                 f"{(partial_read - reread + full_read) / max(total_bytes, 1):.1%}")
+    return [items for _, items in done + pending], errors
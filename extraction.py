@@ -1,15 +1,87 @@
 import os
-import shutil
-import zipfile
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from duplicates import HASH_WORKERS, find_duplicates
+from phash import DEFAULT_THRESHOLD, DEFAULT_THRESHOLDS, HASH_FUNCS, find_similar
+from transfer import COPY_WORKERS, transfer_files
+from zipwriter import DEFAULT_LEVEL, ZIP_STORED, ZIP_WORKERS, write_zip
+
+# 由传输引擎处理的提取方案：方案名 -> (传输模式, 日志中的动作名称)
+TRANSFER_SCHEMES = {
+    "复制文件": ("copy", "复制"),
+    "移动文件": ("move", "移动"),
+    "硬链接": ("hardlink", "硬链接"),
+    "reflink/CoW 克隆": ("reflink", "克隆"),
+}
+
+# 重复文件筛选：在其他过滤条件之后找出内容完全相同的文件，再交给所选的提取方案处理
+DUPLICATE_MODES = ["不筛选", "重复文件（每组保留一个，处理其余）", "重复文件（全部）", "去重后的文件（每组只取一个）"]
+# 判断重复的方式：内容完全相同，或按感知哈希判断的相似图片
+COMPARE_MODES = ["内容完全相同"] + [f"相似图片({algo})" for algo in HASH_FUNCS]
+# 每组重复文件中保留哪一个
+KEEP_RULES = {
+    "路径排序第一个": lambda item: item[0],
+    "修改时间最早": lambda item: (item[2], item[0]),
+    "修改时间最新": lambda item: (-item[2], item[0]),
+    "文件最大": lambda item: (-item[1], item[0]),
+}
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def _scan_dir(path, exclude):
+    # 读取单个目录，返回 (文件 DirEntry 列表, 子目录路径列表)；与 os.walk 一样忽略无法访问的目录，不跟随目录符号链接
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if exclude and _norm(entry.path) in exclude:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return files, subdirs
+
+def scan_files(directory, recursive=True, workers=1, exclude=()):
+    """逐个产出目录下文件的 os.DirEntry，边扫描边产出，调用方无需等待整个目录树扫描完毕。
+    workers 大于 1 时各子目录分发到线程池中提前并行读取（网络盘上效果明显），产出顺序仍与单线程扫描相同。
+    exclude 中的文件或目录不会产出，用于跳过位于输入目录内的输出目标，避免处理刚写出的文件"""
+    exclude = {_norm(path) for path in exclude}
+    if not recursive or workers <= 1:
+        pending = [directory]
+        while pending:
+            files, subdirs = _scan_dir(pending.pop(), exclude)
+            yield from files
+            if recursive:
+                pending.extend(reversed(subdirs))
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # 子目录一经发现就提交读取，但按与单线程相同的深度优先顺序取结果，文件列表、日志和压缩包内顺序每次一致
+        pending = [pool.submit(_scan_dir, directory, exclude)]
+        while pending:
+            files, subdirs = pending.pop().result()
+            yield from files
+            # 按目录顺序提交以便先读到的先用上，倒序压栈使第一个子目录最先取出
+            pending.extend(reversed([pool.submit(_scan_dir, d, exclude) for d in subdirs]))
+
 class ExtractionFrame(ttk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         self.match_rules = []  # 保存多条文件名匹配规则，格式为 (匹配方式, 匹配文本)
         self.create_widgets()
+        self.setup_queue()
 
     def create_widgets(self):
         # 输入目录选择
@@ -25,6 +97,12 @@ class ExtractionFrame(ttk.Frame):
         subdir_frame.pack(pady=5, padx=10, fill=tk.X)
         self.subdirs_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(subdir_frame, text="包括子目录", variable=self.subdirs_var).pack(side=tk.LEFT)
+        ttk.Label(subdir_frame, text="扫描线程数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.scan_workers_var = tk.StringVar(value="4")
+        ttk.Spinbox(subdir_frame, from_=1, to=32, textvariable=self.scan_workers_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(subdir_frame, text="复制/移动线程数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.copy_workers_var = tk.StringVar(value=str(COPY_WORKERS))
+        ttk.Spinbox(subdir_frame, from_=1, to=64, textvariable=self.copy_workers_var, width=5).pack(side=tk.LEFT, padx=5)
 
         # 提取方案选择（新增“删除文件”操作）
         scheme_frame = ttk.Frame(self)
@@ -35,11 +113,26 @@ class ExtractionFrame(ttk.Frame):
             scheme_frame,
             textvariable=self.scheme_var,
             state="readonly",
-            values=["复制文件", "移动文件", "压缩为ZIP", "生成文件列表", "删除文件"]
+            values=list(TRANSFER_SCHEMES) + ["压缩为ZIP", "生成文件列表", "删除文件"]
         )
         self.scheme_combobox.pack(side=tk.LEFT, padx=5)
+        ttk.Label(scheme_frame, text="硬链接、克隆只能在同一卷上完成，跨卷或文件系统不支持时自动改为复制；\n"
+                                     "硬链接与原文件是同一份数据，修改其中一个另一个也会改变", foreground="gray").pack(side=tk.LEFT, padx=5)
         self.scheme_combobox.bind("<<ComboboxSelected>>", self.scheme_changed)
 
+        # ZIP 选项：JPEG/PNG/WebP 等已压缩格式直接存储，其余文件按压缩级别 deflate
+        zip_frame = ttk.Frame(self)
+        zip_frame.pack(pady=5, padx=10, fill=tk.X)
+        ttk.Label(zip_frame, text="ZIP压缩级别:").pack(side=tk.LEFT)
+        self.zip_level_var = tk.StringVar(value=str(DEFAULT_LEVEL))
+        ttk.Spinbox(zip_frame, from_=1, to=9, textvariable=self.zip_level_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(zip_frame, text="压缩线程数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.zip_workers_var = tk.StringVar(value=str(ZIP_WORKERS))
+        ttk.Spinbox(zip_frame, from_=1, to=64, textvariable=self.zip_workers_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(zip_frame, text="分卷大小 (MB，0为不拆分):").pack(side=tk.LEFT, padx=(15, 0))
+        self.zip_volume_var = tk.StringVar(value="0")
+        ttk.Entry(zip_frame, textvariable=self.zip_volume_var, width=8).pack(side=tk.LEFT, padx=5)
+
         # 输出目标选择（复制、移动选择目录；压缩和生成列表选择文件路径；删除文件不需要输出目标）
         output_frame = ttk.Frame(self)
         output_frame.pack(pady=10, padx=10, fill=tk.X)
@@ -88,6 +181,34 @@ class ExtractionFrame(ttk.Frame):
         self.mod_before_entry = ttk.Entry(mod_before_frame, width=15)
         self.mod_before_entry.pack(side=tk.LEFT, padx=5)
 
+        # 重复文件筛选
+        duplicate_frame = ttk.Frame(filters_frame)
+        duplicate_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(duplicate_frame, text="重复文件:").pack(side=tk.LEFT)
+        self.dup_mode_var = tk.StringVar(value=DUPLICATE_MODES[0])
+        ttk.Combobox(duplicate_frame, textvariable=self.dup_mode_var, state="readonly",
+                     values=DUPLICATE_MODES, width=30).pack(side=tk.LEFT, padx=5)
+        ttk.Label(duplicate_frame, text="保留:").pack(side=tk.LEFT, padx=(10, 0))
+        self.dup_keep_var = tk.StringVar(value=next(iter(KEEP_RULES)))
+        ttk.Combobox(duplicate_frame, textvariable=self.dup_keep_var, state="readonly",
+                     values=list(KEEP_RULES), width=14).pack(side=tk.LEFT, padx=5)
+        ttk.Label(duplicate_frame, text="读取线程数:").pack(side=tk.LEFT, padx=(10, 0))
+        self.dup_workers_var = tk.StringVar(value=str(HASH_WORKERS))
+        ttk.Spinbox(duplicate_frame, from_=1, to=64, textvariable=self.dup_workers_var, width=5).pack(side=tk.LEFT, padx=5)
+        similar_frame = ttk.Frame(filters_frame)
+        similar_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(similar_frame, text="比较方式:").pack(side=tk.LEFT)
+        self.dup_compare_var = tk.StringVar(value=COMPARE_MODES[0])
+        compare_combobox = ttk.Combobox(similar_frame, textvariable=self.dup_compare_var, state="readonly",
+                                        values=COMPARE_MODES, width=16)
+        compare_combobox.pack(side=tk.LEFT, padx=5)
+        compare_combobox.bind("<<ComboboxSelected>>", self.on_compare_change)
+        ttk.Label(similar_frame, text="相似阈值 (汉明距离 0-64):").pack(side=tk.LEFT, padx=(10, 0))
+        self.dup_threshold_var = tk.StringVar(value=str(DEFAULT_THRESHOLD))
+        ttk.Spinbox(similar_frame, from_=0, to=64, textvariable=self.dup_threshold_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(similar_frame, text="相似图片按感知哈希比较，可找出缩放、重新压缩过的同一张图片；阈值越大越宽松",
+                  foreground="gray").pack(side=tk.LEFT, padx=5)
+
         # 多条文件名匹配规则（并集逻辑）
         filename_multi_frame = ttk.LabelFrame(filters_frame, text="文件名多条匹配规则 (并集)", padding=10)
         filename_multi_frame.pack(fill=tk.X, pady=5)
@@ -117,7 +238,8 @@ class ExtractionFrame(ttk.Frame):
         # 开始运行按钮
         action_frame = ttk.Frame(self)
         action_frame.pack(pady=10)
-        ttk.Button(action_frame, text="开始运行", command=self.start_extraction).pack()
+        self.btn_start = ttk.Button(action_frame, text="开始运行", command=self.start_extraction)
+        self.btn_start.pack()
 
         # 日志显示区域
         log_frame = ttk.Frame(self)
@@ -146,7 +268,7 @@ class ExtractionFrame(ttk.Frame):
     def select_output_target(self):
         scheme = self.scheme_var.get()
         # 对于复制、移动操作选择目录；对于ZIP和生成文件列表选择文件路径
-        if scheme in ["复制文件", "移动文件"]:
+        if scheme in TRANSFER_SCHEMES:
             folder = filedialog.askdirectory(title="选择输出目录")
             if folder:
                 self.output_entry.delete(0, tk.END)
@@ -188,56 +310,214 @@ class ExtractionFrame(ttk.Frame):
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
 
-    def get_file_list(self, directory, include_subdirs=True):
-        files_found = []
-        if include_subdirs:
-            for root, _, files in os.walk(directory):
-                for f in files:
-                    full_path = os.path.join(root, f)
-                    if os.path.isfile(full_path):
-                        files_found.append(full_path)
-        else:
-            for f in os.listdir(directory):
-                full_path = os.path.join(directory, f)
-                if os.path.isfile(full_path):
-                    files_found.append(full_path)
-        filtered_files = []
+    def setup_queue(self):
+        self.message_queue = queue.Queue()
+        self.after(100, self.process_messages)
+
+    def process_messages(self):
+        while not self.message_queue.empty():
+            msg_type, content = self.message_queue.get()
+            if msg_type == "done":
+                self.btn_start.config(state="normal")
+                messagebox.showinfo("完成", content)
+            else:
+                self.log(content)
+        self.after(100, self.process_messages)
+
+    def make_filter(self):
+        # 解析过滤条件，返回判断单个 DirEntry 是否符合条件的函数；
+        # 先按文件名判断，只有设置了大小或日期条件时才读取文件属性（DirEntry 会缓存 stat 结果）
         filetypes = [x.strip().lower() for x in self.filetype_entry.get().split(",") if x.strip()]
         min_size = float(self.min_size_entry.get()) if self.min_size_entry.get() else None
         max_size = float(self.max_size_entry.get()) if self.max_size_entry.get() else None
         mod_after_date = datetime.strptime(self.mod_after_entry.get(), "%Y-%m-%d") if self.mod_after_entry.get() else None
         mod_before_date = datetime.strptime(self.mod_before_entry.get(), "%Y-%m-%d") if self.mod_before_entry.get() else None
+        match_rules = list(self.match_rules)
+        need_stat = bool(min_size or max_size or mod_after_date or mod_before_date)
 
-        for file in files_found:
-            filename = os.path.basename(file)
-            ext = os.path.splitext(file)[1][1:].lower()
+        def accept(entry):
+            filename = entry.name
+            ext = os.path.splitext(filename)[1][1:].lower()
             if filetypes and ext not in filetypes:
-                continue
-            size_kb = os.path.getsize(file) / 1024.0
-            if min_size and size_kb < min_size:
-                continue
-            if max_size and size_kb > max_size:
-                continue
-            mod_time = datetime.fromtimestamp(os.path.getmtime(file))
-            if mod_after_date and mod_time < mod_after_date:
-                continue
-            if mod_before_date and mod_time > mod_before_date:
-                continue
-
+                return False
             # 多条文件名匹配规则（并集逻辑）：只要满足任意一条规则即可
-            if self.match_rules:
+            if match_rules:
                 matched = any(
                     (mtype == "包含" and mtext in filename) or
                     (mtype == "以…开始" and filename.startswith(mtext)) or
                     (mtype == "以…结束" and filename.endswith(mtext)) or
                     (mtype == "完全匹配" and filename == mtext)
-                    for mtype, mtext in self.match_rules
+                    for mtype, mtext in match_rules
                 )
                 if not matched:
+                    return False
+            if need_stat:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    return False
+                size_kb = st.st_size / 1024.0
+                if min_size and size_kb < min_size:
+                    return False
+                if max_size and size_kb > max_size:
+                    return False
+                mod_time = datetime.fromtimestamp(st.st_mtime)
+                if mod_after_date and mod_time < mod_after_date:
+                    return False
+                if mod_before_date and mod_time > mod_before_date:
+                    return False
+            return True
+        return accept
+
+    def get_file_list(self, directory, include_subdirs=True, exclude=()):
+        # 返回符合条件的文件路径的生成器，过滤条件在调用时立即解析，文件边扫描边产出
+        accept = self.make_filter()
+        try:
+            workers = max(1, int(self.scan_workers_var.get()))
+        except ValueError:
+            workers = 1
+        entries = (entry for entry in scan_files(directory, include_subdirs, workers, exclude) if accept(entry))
+        dup_mode = self.dup_mode_var.get()
+        if dup_mode == DUPLICATE_MODES[0]:
+            return (entry.path for entry in entries)
+        try:
+            hash_workers = max(1, int(self.dup_workers_var.get()))
+            threshold = min(64, max(0, int(self.dup_threshold_var.get())))
+        except ValueError:
+            hash_workers, threshold = HASH_WORKERS, None
+        algo = self.compare_algo()
+        if threshold is None:
+            threshold = DEFAULT_THRESHOLDS.get(algo, DEFAULT_THRESHOLD)
+        return self.iter_duplicates(entries, dup_mode, KEEP_RULES[self.dup_keep_var.get()], hash_workers, algo, threshold)
+
+    def compare_algo(self):
+        # 当前比较方式对应的感知哈希算法，按内容完全相同比较时为 None
+        compare = self.dup_compare_var.get()
+        return next((algo for algo in HASH_FUNCS if compare == f"相似图片({algo})"), None)
+
+    def on_compare_change(self, event=None):
+        # 切换哈希算法时换成该算法的默认阈值，两种算法的距离分布不同
+        algo = self.compare_algo()
+        if algo:
+            self.dup_threshold_var.set(str(DEFAULT_THRESHOLDS[algo]))
+
+    def find_similar_groups(self, items, algo, threshold, workers):
+        # 按感知哈希聚类，返回与 find_duplicates 相同格式的分组
+        by_path = {item[0]: item for item in items}
+        reported = [0]
+
+        def progress(done, total):
+            if done - reported[0] >= 1000 or done == total:
+                reported[0] = done
+                self.message_queue.put(("info", f"已计算 {done}/{total} 个图片哈希"))
+
+        groups, errors = find_similar(list(by_path), algo, threshold, workers, progress)
+        self.message_queue.put(("info", f"{algo} 相似阈值 {threshold}"))
+        return [[by_path[path] for path in group] for group in groups], list(errors.items())
+
+    def iter_duplicates(self, entries, dup_mode, keep_key, workers, algo=None, threshold=DEFAULT_THRESHOLD):
+        # 需要所有文件的大小才能分组，因此先扫描完毕再查找重复文件，之后按筛选方式逐个产出路径。
+        # algo 为感知哈希算法时按图片相似度分组，否则按内容完全相同分组
+        items, unique = [], []
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            items.append((entry.path, st.st_size, st.st_mtime))
+        if algo:
+            self.message_queue.put(("info", "正在查找相似图片..."))
+            groups, errors = self.find_similar_groups(items, algo, threshold, workers)
+        else:
+            self.message_queue.put(("info", "正在查找重复文件..."))
+            groups, errors = find_duplicates(items, workers, progress=lambda msg: self.message_queue.put(("info", msg)))
+        for path, err in errors:
+            self.message_queue.put(("error", f"读取失败，未参与重复比较: {path}：{err}"))
+        extra = sum(len(group) - 1 for group in groups)
+        self.message_queue.put(("info", f"找到 {len(groups)} 组重复文件，可去除 {extra} 个"))
+        if dup_mode == DUPLICATE_MODES[3]:
+            duplicated = {item[0] for group in groups for item in group}
+            unique = [item[0] for item in items if item[0] not in duplicated]
+        for group in groups:
+            group.sort(key=keep_key)
+            if dup_mode == DUPLICATE_MODES[1]:
+                yield from (item[0] for item in group[1:])
+            elif dup_mode == DUPLICATE_MODES[2]:
+                yield from (item[0] for item in group)
+            else:
+                yield group[0][0]
+        yield from unique
+
+    def run_transfer(self, files, input_dir, output, include_subdirs, scheme, workers):
+        # 在后台线程中并行复制、移动、链接或克隆。日志记录失败的文件和改为复制的文件（含原因），
+        # 按首选方式完成的文件只在定期汇总和最终统计中体现，避免逐个文件刷新界面
+        mode, action = TRANSFER_SCHEMES[scheme]
+        start = last_report = time.perf_counter()
+        count = failed = total_bytes = 0
+        methods = {}
+
+        def rate():
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            return f"{total_bytes / 1048576:.1f} MB，用时 {elapsed:.1f} 秒，平均 {total_bytes / 1048576 / elapsed:.1f} MB/s，{count / elapsed:.0f} 个/秒"
+
+        try:
+            pairs = ((file, os.path.join(output, os.path.relpath(file, input_dir) if include_subdirs else os.path.basename(file)))
+                     for file in files)
+            for src, dest, method, size, reason, err in transfer_files(pairs, mode, workers):
+                if err is not None:
+                    failed += 1
+                    self.message_queue.put(("error", f"{action}失败: {src} -> {dest}：{err}"))
                     continue
+                if reason:
+                    self.message_queue.put(("info", f"{reason}，无法{action}，已改为复制（{method}）: {src} -> {dest}"))
+                count += 1
+                total_bytes += size
+                methods[method] = methods.get(method, 0) + 1
+                now = time.perf_counter()
+                if now - last_report >= 1:
+                    last_report = now
+                    self.message_queue.put(("info", f"已{action} {count} 个文件，{rate()}"))
+        except Exception as e:
+            self.message_queue.put(("error", f"发生错误: {e}"))
+        detail = "，".join(f"{name} {n} 个" for name, n in methods.items())
+        self.message_queue.put(("info", f"{action}完成：成功 {count} 个（{detail or '无'}），失败 {failed} 个，{rate()}"))
+        self.message_queue.put(("done", "文件提取操作完成！"))
+
+    def run_zip(self, files, input_dir, output, include_subdirs, level, workers, volume_size):
+        # 在后台线程中写出 ZIP，日志只记录失败的文件和定期汇总的进度
+        start = last_report = time.perf_counter()
+        count = stored = failed = total_bytes = written_bytes = 0
+        volumes = []
+        written_paths = set()
+
+        def rate():
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            return (f"原始 {total_bytes / 1048576:.1f} MB，写入 {written_bytes / 1048576:.1f} MB，用时 {elapsed:.1f} 秒，"
+                    f"平均 {total_bytes / 1048576 / elapsed:.1f} MB/s")
 
-            filtered_files.append(file)
-        return filtered_files
+        try:
+            # 输出在输入目录内时，跳过已写出的分卷
+            items = ((file, os.path.relpath(file, input_dir) if include_subdirs else os.path.basename(file))
+                     for file in files if os.path.abspath(file) not in written_paths)
+            for arcname, method, size, written, err in write_zip(items, output, level, workers, volume_size or None, volumes):
+                written_paths.update(os.path.abspath(v) for v in volumes)
+                if err is not None:
+                    failed += 1
+                    self.message_queue.put(("error", f"添加进压缩包失败: {arcname}：{err}"))
+                    continue
+                count += 1
+                stored += method == ZIP_STORED
+                total_bytes += size
+                written_bytes += written
+                now = time.perf_counter()
+                if now - last_report >= 1:
+                    last_report = now
+                    self.message_queue.put(("info", f"已压缩 {count} 个文件，{rate()}"))
+        except Exception as e:
+            self.message_queue.put(("error", f"发生错误: {e}"))
+        self.message_queue.put(("info", f"压缩完成：成功 {count} 个（直接存储 {stored} 个），失败 {failed} 个，{rate()}"))
+        self.message_queue.put(("info", "ZIP 文件保存到 " + "、".join(volumes)))
+        self.message_queue.put(("done", "文件提取操作完成！"))
 
     def start_extraction(self):
         input_dir = self.input_entry.get()
@@ -253,52 +533,59 @@ class ExtractionFrame(ttk.Frame):
             messagebox.showerror("错误", "请输入有效的输出路径")
             return
 
-        files = self.get_file_list(input_dir, include_subdirs)
-        self.log(f"共找到 {len(files)} 个符合条件的文件")
+        # 删除操作前，先询问用户确认删除操作
+        if scheme == "删除文件" and not messagebox.askyesno("确认删除", "确定要删除所有符合条件的文件吗？此操作不可恢复！"):
+            return
 
+        output_target = self.output_entry.get()
+        files = self.get_file_list(input_dir, include_subdirs, exclude=[output_target] if output_target else [])
+
+        if scheme in TRANSFER_SCHEMES:
+            try:
+                workers = max(1, int(self.copy_workers_var.get()))
+            except ValueError:
+                workers = COPY_WORKERS
+            self.btn_start.config(state="disabled")
+            threading.Thread(target=self.run_transfer,
+                             args=(files, input_dir, self.output_entry.get(), include_subdirs, scheme, workers),
+                             daemon=True).start()
+            return
+        if scheme == "压缩为ZIP":
+            try:
+                level = min(9, max(1, int(self.zip_level_var.get())))
+                workers = max(1, int(self.zip_workers_var.get()))
+                volume_size = int(float(self.zip_volume_var.get() or 0) * 1048576)
+            except ValueError:
+                messagebox.showerror("错误", "压缩级别、线程数和分卷大小请输入有效的数字")
+                return
+            self.btn_start.config(state="disabled")
+            threading.Thread(target=self.run_zip,
+                             args=(files, input_dir, self.output_entry.get(), include_subdirs, level, workers, volume_size),
+                             daemon=True).start()
+            return
+        self.btn_start.config(state="disabled")
+        threading.Thread(target=self.run_list_or_delete, args=(files, scheme, output_target), daemon=True).start()
+
+    def run_list_or_delete(self, files, scheme, output):
+        # 生成文件列表与删除文件同样在后台线程中执行，查找重复文件等耗时步骤不会阻塞界面
+        count = 0
         try:
-            if scheme == "复制文件":
-                output = self.output_entry.get()
-                for file in files:
-                    rel = os.path.relpath(file, input_dir) if include_subdirs else os.path.basename(file)
-                    dest = os.path.join(output, rel)
-                    os.makedirs(os.path.dirname(dest), exist_ok=True)
-                    shutil.copy2(file, dest)
-                    self.log(f"复制: {file} -> {dest}")
-            elif scheme == "移动文件":
-                output = self.output_entry.get()
-                for file in files:
-                    rel = os.path.relpath(file, input_dir) if include_subdirs else os.path.basename(file)
-                    dest = os.path.join(output, rel)
-                    os.makedirs(os.path.dirname(dest), exist_ok=True)
-                    shutil.move(file, dest)
-                    self.log(f"移动: {file} -> {dest}")
-            elif scheme == "压缩为ZIP":
-                output = self.output_entry.get()
-                with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for file in files:
-                        arcname = os.path.relpath(file, input_dir) if include_subdirs else os.path.basename(file)
-                        zipf.write(file, arcname)
-                        self.log(f"添加进压缩包: {arcname}")
-                self.log(f"ZIP 文件保存到 {output}")
-            elif scheme == "生成文件列表":
-                output = self.output_entry.get()
+            if scheme == "生成文件列表":
                 with open(output, 'w', encoding='utf-8') as f:
                     for file in files:
                         f.write(file + "\n")
-                        self.log(f"列表记录: {file}")
-                self.log(f"文件列表保存到 {output}")
+                        count += 1
+                        self.message_queue.put(("info", f"列表记录: {file}"))
+                self.message_queue.put(("info", f"文件列表保存到 {output}"))
             elif scheme == "删除文件":
-                # 删除操作前，先询问用户确认删除操作
-                if not messagebox.askyesno("确认删除", "确定要删除所有符合条件的文件吗？此操作不可恢复！"):
-                    return
                 for file in files:
                     os.remove(file)
-                    self.log(f"删除: {file}")
-            messagebox.showinfo("完成", "文件提取操作完成！")
+                    count += 1
+                    self.message_queue.put(("info", f"删除: {file}"))
         except Exception as e:
-            self.log(f"发生错误: {e}")
-            messagebox.showerror("错误", str(e))
+            self.message_queue.put(("error", f"发生错误: {e}"))
+        self.message_queue.put(("info", f"共处理 {count} 个符合条件的文件"))
+        self.message_queue.put(("done", "文件提取操作完成！"))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -14,7 +14,8 @@ class HomeFrame(ttk.Frame):
             "图片尺寸调整": 5,
             "图片旋转": 6,
             "图片合并": 7,
-            "文件提删": 8
+            "文件提删": 8,
+            "图片切片": 9
         }
         self.create_widgets()
         # 渐变颜色列表
@@ -43,7 +44,8 @@ class HomeFrame(ttk.Frame):
             ("图片尺寸调整", "#7986CB"),
             ("图片旋转", "#81C784"),
             ("图片合并", "#BA68C8"),
-            ("文件提删", "#FF9800")
+            ("文件提删", "#FF9800"),
+            ("图片切片", "#E57373")
         ]
         for tool_name, color in tool_styles:
             lbl = tk.Label(tools_frame, text=tool_name, fg=color,
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# 持久化的图片元数据索引（尺寸、格式、模式），以路径为键，文件大小和修改时间作为校验。
+# 各工具查询尺寸时先查索引，只有新增或改动过的文件才重新读取文件头，
+# 同一目录第二次选择时几乎不需要访问图片文件本身。
+
+INDEX_PATH = os.path.join(os.path.expanduser("~"), ".image_tools_index.sqlite3")
+PROBE_WORKERS = 16  # 读取文件头以 I/O 等待为主，网络盘上多线程可明显缩短总耗时
+
+ImageInfo = namedtuple("ImageInfo", "width height format mode")
+
+def _key(path):
+    # 统一路径写法，避免同一文件因分隔符、大小写或相对路径不同而重复登记
+    return os.path.normcase(os.path.abspath(path))
+
+def probe_header(path):
+    # Image.open 只解析文件头，不解码像素
+    with Image.open(path) as img:
+        return ImageInfo(img.width, img.height, img.format or "", img.mode)
+
+class ImageIndex:
+    def __init__(self, db_path=INDEX_PATH):
+        self.lock = threading.Lock()
+        try:
+            self.conn = self._connect(db_path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            # 索引文件不可用（只读目录、文件损坏等）时退化为仅内存索引，不影响各工具使用
+            self.conn = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(db_path):
+        conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        conn.execute("""CREATE TABLE IF NOT EXISTS images (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,
+            width INTEGER, height INTEGER, format TEXT, mode TEXT)""")
+        # 感知哈希按 路径 + 算法 记录；64 位无符号哈希按有符号整数存储
+        conn.execute("""CREATE TABLE IF NOT EXISTS hashes (
+            path TEXT, algo TEXT, size INTEGER, mtime_ns INTEGER, hash INTEGER,
+            PRIMARY KEY (path, algo))""")
+        conn.commit()
+        return conn
+
+    def _cached(self, paths):
+        # 批量取出已记录的条目：{路径: (文件大小, 修改时间, ImageInfo)}
+        rows = {}
+        paths = list(paths)
+        with self.lock:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                cursor = self.conn.execute(
+                    f"SELECT path, size, mtime_ns, width, height, format, mode FROM images WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk)
+                for path, size, mtime_ns, *info in cursor:
+                    rows[path] = (size, mtime_ns, ImageInfo(*info))
+        return rows
+
+    def _store(self, records):
+        if not records:
+            return
+        with self.lock:
+            try:
+                self.conn.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                self.conn.commit()
+            except sqlite3.Error:
+                # 其他进程长时间占用数据库时放弃本次写入，下次查询会重新读取文件头
+                self.conn.rollback()
+
+    def scan(self, paths, workers=PROBE_WORKERS, progress=None):
+        """返回 (infos, errors)：infos 为 {路径: ImageInfo}，errors 为 {路径: 异常}。
+        文件大小或修改时间与索引不一致的文件才会重新读取文件头；progress(已完成数, 总数) 用于回报进度"""
+        paths = list(paths)
+        cached = self._cached(_key(path) for path in paths)
+        infos, errors = {}, {}
+
+        def check(path):
+            try:
+                st = os.stat(path)
+                key = _key(path)
+                entry = cached.get(key)
+                if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                    return path, entry[2], None, None
+                info = probe_header(path)
+                return path, info, (key, st.st_size, st.st_mtime_ns, *info), None
+            except Exception as e:
+                return path, None, None, e
+
+        records = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for done, (path, info, record, err) in enumerate(pool.map(check, paths), start=1):
+                if err is not None:
+                    errors[path] = err
+                else:
+                    infos[path] = info
+                if record:
+                    records.append(record)
+                    if len(records) >= 1000:
+                        self._store(records)
+                        records = []
+                if progress:
+                    progress(done, len(paths))
+        self._store(records)
+        return infos, errors
+
+    def scan_hashes(self, paths, algo, compute, workers=PROBE_WORKERS, progress=None):
+        """返回 ({路径: 哈希}, {路径: 异常})。compute(路径) 计算单个文件的哈希，
+        与 scan 相同，文件大小和修改时间与索引一致时直接使用记录的结果"""
+        paths = list(paths)
+        cached = {}
+        with self.lock:
+            keys = [_key(path) for path in paths]
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                cursor = self.conn.execute(
+                    f"SELECT path, size, mtime_ns, hash FROM hashes WHERE algo = ? AND path IN ({','.join('?' * len(chunk))})",
+                    [algo] + chunk)
+                for path, size, mtime_ns, value in cursor:
+                    cached[path] = (size, mtime_ns, value & 0xFFFFFFFFFFFFFFFF)
+        hashes, errors = {}, {}
+
+        def check(path):
+            try:
+                st = os.stat(path)
+                key = _key(path)
+                entry = cached.get(key)
+                if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                    return path, entry[2], None, None
+                value = compute(path)
+                signed = value - (1 << 64) if value >= 1 << 63 else value
+                return path, value, (key, algo, st.st_size, st.st_mtime_ns, signed), None
+            except Exception as e:
+                return path, None, None, e
+
+        records = []
+
+        def store():
+            with self.lock:
+                try:
+                    self.conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)", records)
+                    self.conn.commit()
+                except sqlite3.Error:
+                    self.conn.rollback()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for done, (path, value, record, err) in enumerate(pool.map(check, paths), start=1):
+                if err is not None:
+                    errors[path] = err
+                else:
+                    hashes[path] = value
+                if record:
+                    records.append(record)
+                    if len(records) >= 1000:
+                        store()
+                        records = []
+                if progress:
+                    progress(done, len(paths))
+        if records:
+            store()
+        return hashes, errors
+
+    def get(self, path):
+        # 查询单个文件，读取失败时抛出与 Image.open 相同的异常
+        infos, errors = self.scan([path], workers=1)
+        if path in errors:
+            raise errors[path]
+        return infos[path]
+
+_index = None
+_index_lock = threading.Lock()
+# fork 时从父进程继承的索引，只保留引用，避免子进程在回收时关闭父进程的连接
+_inherited = None
+
+def get_index():
+    # 进程内共享同一个索引连接
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ImageIndex()
+        return _index
+
+def _reset_after_fork():
+    # SQLite 连接不能跨 fork 使用，父进程中被其他线程持有的锁在子进程里也永远不会释放，
+    # 因此 fork 出的工作进程（缩放、拼接的进程池）首次调用 get_index 时重新打开索引
+    global _index, _index_lock, _inherited
+    _inherited, _index = _index, None
+    _index_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def image_info(path):
+    return get_index().get(path)
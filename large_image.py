@@ -0,0 +1,151 @@
+import math
+import os
+import tempfile
+from PIL import Image, BmpImagePlugin, PngImagePlugin, TiffImagePlugin
+
+from strips import open_strip_reader, open_strip_writer
+
+# 超大图片的按条带缩放与旋转：输入按行条带解码，输出按条带写出，
+# 峰值内存由内存预算决定，与图片尺寸无关；也不受 Image.open 的像素数上限限制。
+# 仅支持可以按条带读写的 PNG、TIFF 和未压缩 BMP。
+
+DEFAULT_MEMORY_BUDGET = 1024 << 20
+
+# 各重采样滤波器的支撑半径（以输出像素计），决定每个条带需要额外读取的上下文行数
+FILTER_SUPPORT = {Image.NEAREST: 0.5, Image.BOX: 0.5, Image.BILINEAR: 1, Image.HAMMING: 1, Image.BICUBIC: 2, Image.LANCZOS: 3}
+
+HEADER_CLASSES = {b"\x89PNG": PngImagePlugin.PngImageFile, b"II*\x00": TiffImagePlugin.TiffImageFile,
+                  b"MM\x00*": TiffImagePlugin.TiffImageFile, b"II+\x00": TiffImagePlugin.TiffImageFile,
+                  b"MM\x00+": TiffImagePlugin.TiffImageFile, b"BM": BmpImagePlugin.BmpImageFile}
+
+def _pixel_bytes(mode):
+    # Pillow 内部多通道图像每像素占 4 字节
+    return 4 if Image.getmodebands(mode) > 1 else 1
+
+def _rows_for_budget(width, mode, budget, copies):
+    return max(1, budget // (copies * width * _pixel_bytes(mode)))
+
+def needs_strips(path, budget):
+    """文件为 PNG/TIFF/BMP、整图解码超出内存预算（或超过 Pillow 像素数上限）且条带读取器支持该文件时返回 True。
+    只读取文件头，且不经过 Image.open，超大图片也不会触发解压炸弹检查；
+    16 位或隔行扫描的 PNG、分块 TIFF、压缩 BMP 等不支持按条带读取的文件返回 False，仍按整图处理"""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    for prefix, header_class in HEADER_CLASSES.items():
+        if magic.startswith(prefix):
+            break
+    else:
+        return False
+    with header_class(path) as img:
+        pixels = img.width * img.height
+        size = pixels * _pixel_bytes(img.mode)
+    if size <= budget and (Image.MAX_IMAGE_PIXELS is None or pixels <= Image.MAX_IMAGE_PIXELS):
+        return False
+    try:
+        open_strip_reader(path).close()
+    except ValueError:
+        return False
+    return True
+
+def _output_mode(mode, fmt):
+    # 条带写出器只支持 L/LA/RGB/RGBA（BMP 只支持 L/RGB），其余模式统一转换
+    if fmt == "BMP":
+        return mode if mode in ("L", "RGB") else "RGB"
+    if mode in ("L", "LA", "RGB", "RGBA"):
+        return mode
+    if mode == "P":
+        return "RGBA"
+    return "RGB"
+
+def resize_large(input_path, output_path, target_w, target_h, keep_ratio, bg_color, resample, budget=DEFAULT_MEMORY_BUDGET):
+    """按条带缩放，结果与 resizing.resize_image 一致：保持宽高比时居中放在背景色画布上。
+    每个输出条带只读取对应的输入行及滤波器所需的上下文行"""
+    reader = open_strip_reader(input_path)
+    try:
+        in_w, in_h = reader.width, reader.height
+        if keep_ratio:
+            scale = min(target_w / in_w, target_h / in_h)
+            new_w, new_h = int(in_w * scale), int(in_h * scale)
+            mode = "RGB"
+        else:
+            new_w, new_h = target_w, target_h
+            mode = "RGB" if reader.mode in ("RGBA", "LA", "P") else _output_mode(reader.mode, reader.format)
+        left, top = (target_w - new_w) // 2, (target_h - new_h) // 2
+        scale_y = in_h / new_h
+        margin = math.ceil(FILTER_SUPPORT.get(resample, 3) * max(scale_y, 1)) + 1
+        # 输入窗口（含上下文）、缩放结果和输出条带大致各占预算的三分之一
+        window_rows = _rows_for_budget(in_w, reader.mode, budget, 3)
+        out_rows = max(1, min(_rows_for_budget(target_w, mode, budget, 3), int((window_rows - 2 * margin) / scale_y)))
+        with open_strip_writer(output_path, target_w, target_h, mode, reader.format) as writer:
+            for y0 in range(0, target_h, out_rows):
+                y1 = min(target_h, y0 + out_rows)
+                strip = Image.new(mode, (target_w, y1 - y0), bg_color if keep_ratio else None)
+                # 当前输出条带与缩放后图片区域重叠的行
+                a, b = max(y0, top) - top, min(y1, top + new_h) - top
+                if a < b:
+                    sy0, sy1 = a * scale_y, b * scale_y
+                    iy0, iy1 = max(0, math.floor(sy0) - margin), min(in_h, math.ceil(sy1) + margin)
+                    window = reader.read(iy0, iy1)
+                    if window.mode != mode:
+                        window = window.convert(mode)
+                    # box 之外的上下文行会参与滤波计算，条带边界处与整图缩放结果一致
+                    part = window.resize((new_w, b - a), resample, box=(0, sy0 - iy0, in_w, sy1 - iy0))
+                    strip.paste(part, (left, a + top - y0))
+                writer.write(strip)
+    finally:
+        reader.close()
+
+# 各变换下，输入第 y0～y1 行变换后在输出图中的左上角位置
+_PLACEMENT = {
+    Image.Transpose.FLIP_TOP_BOTTOM: lambda y0, y1, w, h: (0, h - y1),
+    Image.Transpose.ROTATE_180: lambda y0, y1, w, h: (0, h - y1),
+    Image.Transpose.ROTATE_90: lambda y0, y1, w, h: (y0, 0),
+    Image.Transpose.ROTATE_270: lambda y0, y1, w, h: (h - y1, 0),
+    Image.Transpose.TRANSPOSE: lambda y0, y1, w, h: (y0, 0),
+    Image.Transpose.TRANSVERSE: lambda y0, y1, w, h: (h - y1, 0),
+}
+
+def transpose_large(input_path, output_path, op, budget=DEFAULT_MEMORY_BUDGET):
+    """按条带旋转或翻转。水平翻转逐条带直接写出；其余变换会改变行的顺序，
+    先把每个变换后的条带原样存入临时文件，再按输出行从临时文件中取出拼成输出条带"""
+    reader = open_strip_reader(input_path)
+    try:
+        in_w, in_h = reader.width, reader.height
+        mode = _output_mode(reader.mode, reader.format)
+        rows = _rows_for_budget(in_w, mode, budget, 3)
+        if op == Image.Transpose.FLIP_LEFT_RIGHT:
+            with open_strip_writer(output_path, in_w, in_h, mode, reader.format) as writer:
+                for y0 in range(0, in_h, rows):
+                    strip = reader.read(y0, min(in_h, y0 + rows))
+                    writer.write((strip if strip.mode == mode else strip.convert(mode)).transpose(op))
+            return
+        if op in (Image.Transpose.ROTATE_90, Image.Transpose.ROTATE_270, Image.Transpose.TRANSPOSE, Image.Transpose.TRANSVERSE):
+            out_w, out_h = in_h, in_w
+        else:
+            out_w, out_h = in_w, in_h
+        with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(output_path))) as store:
+            blocks = []  # (文件偏移, x, y, 宽, 高)
+            for y0 in range(0, in_h, rows):
+                y1 = min(in_h, y0 + rows)
+                strip = reader.read(y0, y1)
+                block = (strip if strip.mode == mode else strip.convert(mode)).transpose(op)
+                x, y = _PLACEMENT[op](y0, y1, in_w, in_h)
+                blocks.append((store.tell(), x, y, block.width, block.height))
+                store.write(block.tobytes())
+            stride_bytes = len(Image.new(mode, (1, 1)).tobytes())
+            out_rows = _rows_for_budget(out_w, mode, budget, 3)
+            with open_strip_writer(output_path, out_w, out_h, mode, reader.format) as writer:
+                for y0 in range(0, out_h, out_rows):
+                    y1 = min(out_h, y0 + out_rows)
+                    strip = Image.new(mode, (out_w, y1 - y0))
+                    for offset, x, y, w, h in blocks:
+                        a, b = max(y0, y), min(y1, y + h)
+                        if a >= b:
+                            continue
+                        # 每个块按行连续存储，重叠的行可一次读出
+                        store.seek(offset + (a - y) * w * stride_bytes)
+                        piece = Image.frombytes(mode, (w, b - a), store.read((b - a) * w * stride_bytes))
+                        strip.paste(piece, (x, a - y0))
+                    writer.write(strip)
+    finally:
+        reader.close()
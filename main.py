@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk
 from home import HomeFrame
@@ -9,6 +10,7 @@ from resizing import ResizingFrame
 from rotate import RotationFrame
 from merge import MergeFrame
 from extraction import ExtractionFrame
+from slicing import SlicingFrame
 
 class ToolboxApp:
     def __init__(self, root):
@@ -23,7 +25,7 @@ class ToolboxApp:
         self.notebook.pack(fill=tk.BOTH, expand=True)
 
         # 创建各功能模块界面，注意这里的顺序必须与 HomeFrame 中的索引映射对应：
-        # 主页索引为 0，后续依次为：图片拼接、DDS转换、批量裁剪、批量重命名、图片尺寸调整、图片旋转、图片合成
+        # 主页索引为 0，后续依次为：图片拼接、DDS转换、批量裁剪、批量重命名、图片尺寸调整、图片旋转、图片合成、文件提删、图片切片
         self.home_frame = HomeFrame(self.notebook, notebook=self.notebook)
         self.stitching_frame = StitchingFrame(self.notebook)
         self.dds_conversion_frame = DDSConversionFrame(self.notebook)
@@ -33,6 +35,7 @@ class ToolboxApp:
         self.rotate_frame = RotationFrame(self.notebook)
         self.merge_frame = MergeFrame(self.notebook)
         self.extraction_frame = ExtractionFrame(self.notebook)
+        self.slicing_frame = SlicingFrame(self.notebook)
 
         # 将各模块添加到 Notebook 中
         self.notebook.add(self.home_frame, text="主页")
@@ -44,8 +47,11 @@ class ToolboxApp:
         self.notebook.add(self.rotate_frame, text="图片旋转")
         self.notebook.add(self.merge_frame, text="图片合并")
         self.notebook.add(self.extraction_frame, text="文件提删")
+        self.notebook.add(self.slicing_frame, text="图片切片")
 
 if __name__ == "__main__":
+    # 打包为 exe 后，批量拼接等功能使用的进程池需要此调用
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ToolboxApp(root)
     root.mainloop()
@@ -1,11 +1,29 @@
+import hashlib
+import io
 import os
 import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from multiprocessing import shared_memory
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, colorchooser, simpledialog
-from PIL import Image, ImageOps
+import numpy as np
+from PIL import Image
+
+from blend import BLEND_MODES, blend_region
+from image_index import image_info
+from stitching import DEFAULT_WORKERS
 
 # 支持的图片格式
 SUPPORTED_EXTS = ('.png', '.jpg', '.jpeg')
+# 并行合成时每个分片最多包含的前景数量
+MERGE_CHUNK = 64
+# 自动识别相框内嵌区域时允许的颜色偏差
+WINDOW_TOLERANCE = 8
+# 每个进程缓存的缩放后前景图总大小上限
+RESIZE_CACHE_BYTES = 256 << 20
 
 # 优化版 ToolTip 类（用于问号提示）
 class ToolTip:
@@ -52,6 +70,210 @@ class ToolTip:
             self.tipwindow.destroy()
             self.tipwindow = None
 
+class Compositor:
+    """合成引擎：背景只转换一次为 RGB，并保留一张可复用的工作画布。
+    每次合成只在前景覆盖的区域内混合，保存后再从背景恢复该区域，
+    因此单张耗时与前景面积相关，而不是与背景尺寸相关。
+    blend_mode 为 BLEND_MODES 中的模式时按混合模式合成，opacity 随混合一并生效"""
+
+    def __init__(self, background, blend_mode=None, opacity=1.0):
+        self.background = background  # 背景（RGB，或映射共享内存的 RGBX），只读
+        # 工作画布在每次合成后都会恢复原样，每个引擎只复制一次
+        self.canvas = background.copy() if background.mode == "RGB" else background.convert("RGB")
+        self.blend_mode = blend_mode
+        self.opacity = opacity
+
+    @contextmanager
+    def composite(self, fg, pos):
+        # fg 为 RGBA，按其透明通道混合；with 块内 yield 的画布仅在块内有效
+        box = (max(0, pos[0]), max(0, pos[1]),
+               min(self.canvas.width, pos[0] + fg.width), min(self.canvas.height, pos[1] + fg.height))
+        if self.blend_mode is None:
+            self.canvas.paste(fg, pos, mask=fg)
+        elif box[0] < box[2] and box[1] < box[3]:
+            region = fg.crop((box[0] - pos[0], box[1] - pos[1], box[2] - pos[0], box[3] - pos[1]))
+            mixed = blend_region(np.asarray(self.canvas.crop(box)), np.asarray(region), self.blend_mode, self.opacity)
+            self.canvas.paste(Image.fromarray(mixed), box[:2])
+        try:
+            yield self.canvas
+        finally:
+            if box[0] < box[2] and box[1] < box[3]:
+                self.canvas.paste(self.background.crop(box), box[:2])
+
+    def blend(self, fg, factor):
+        # 与背景整体按比例混合（前景与背景尺寸一致）
+        return Image.blend(self.canvas, fg.convert("RGB"), factor)
+
+def find_inner_window(img, tolerance=WINDOW_TOLERANCE):
+    """识别相框的内嵌区域，返回 (左, 上, 右, 下) 或 None。
+    中心像素透明时取透明区域，否则取与中心颜色一致（偏差不超过 tolerance）的区域；
+    沿中心行、列找到包含中心的连续区间作为候选矩形，矩形内几乎全部符合条件才算识别成功"""
+    arr = np.asarray(img if img.mode == "RGBA" else img.convert("RGBA"))
+    h, w = arr.shape[:2]
+    cy, cx = h // 2, w // 2
+    alpha = arr[..., 3]
+    if alpha[cy, cx] < 128:
+        mask = alpha < 128
+    else:
+        rgb = arr[..., :3].astype(np.int16)
+        mask = (np.abs(rgb - rgb[cy, cx]).max(axis=2) <= tolerance) & (alpha >= 128)
+
+    def run(line, c):
+        # line 中包含位置 c 的连续 True 区间 [start, end)
+        breaks = np.flatnonzero(~line)
+        return int(breaks[breaks < c].max(initial=-1)) + 1, int(breaks[breaks > c].min(initial=len(line)))
+
+    x0, x1 = run(mask[cy], cx)
+    y0, y1 = run(mask[:, cx], cy)
+    if (x1 - x0, y1 - y0) == (w, h) or x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    if mask[y0:y1, x0:x1].mean() < 0.98:
+        return None
+    return (x0, y0, x1, y1)
+
+@lru_cache(maxsize=16)
+def _cached_window(path, size, mtime_ns):
+    with Image.open(path) as img:
+        return find_inner_window(img)
+
+def inner_window(path):
+    # 识别结果随背景文件缓存，文件大小或修改时间变化后重新识别
+    st = os.stat(path)
+    return _cached_window(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+class ResizeCache:
+    """缩放后前景图的缓存，以 (源尺寸, 文件内容哈希, 目标尺寸) 为键，按最近使用淘汰。
+    重复或内容相同的前景只解码、缩放一次"""
+
+    def __init__(self, max_bytes=RESIZE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.total = 0
+
+    def get(self, key):
+        img = self.items.get(key)
+        if img is not None:
+            self.items.move_to_end(key)
+        return img
+
+    def put(self, key, img):
+        cost = img.width * img.height * 4
+        if cost > self.max_bytes:
+            return
+        self.items[key] = img
+        self.total += cost
+        while self.total > self.max_bytes:
+            _, old = self.items.popitem(last=False)
+            self.total -= old.width * old.height * 4
+
+def load_fitted(fg_path, size, cache):
+    # 读取前景并缩放到 size；返回的图片同时保存在缓存中，调用方不得修改
+    with open(fg_path, "rb") as f:
+        data = f.read()
+    img = Image.open(io.BytesIO(data))
+    key = (img.size, hashlib.blake2b(data, digest_size=16).digest(), size)
+    fg = cache.get(key)
+    if fg is None:
+        fg = img.convert("RGBA").resize(size, Image.LANCZOS)
+        cache.put(key, fg)
+    return fg
+
+@lru_cache(maxsize=None)
+def _opacity_lut(opacity):
+    return [int(p * (opacity / 100)) for p in range(256)]
+
+def merge_position(position_mode, custom_pos, bg_size, fg_size):
+    bg_width, bg_height = bg_size
+    center = ((bg_width - fg_size[0]) // 2, (bg_height - fg_size[1]) // 2)
+    if position_mode == "左上角":
+        return (0, 0)
+    if position_mode == "右下角":
+        return (bg_width - fg_size[0], bg_height - fg_size[1])
+    if position_mode == "自定义":
+        try:
+            return (int(custom_pos[0]), int(custom_pos[1]))
+        except:
+            return center
+    return center
+
+def merge_one(compositor, fg_path, out_path, settings, cache=None):
+    # 合成单张前景并保存，返回错误信息或 None；不依赖界面状态，可在工作进程中执行。
+    # 需要缩放前景时，cache 中已有相同内容、相同目标尺寸的结果则直接复用
+    try:
+        bg_size = compositor.canvas.size
+        region = settings["target_region"]
+        shared = False
+        if settings["auto_adjust"] or region:
+            pos, size = ((0, 0), bg_size) if settings["auto_adjust"] else (region[:2], (region[2] - region[0], region[3] - region[1]))
+            if cache is None:
+                fg = Image.open(fg_path).convert("RGBA").resize(size, Image.LANCZOS)
+            else:
+                fg, shared = load_fitted(fg_path, size, cache), True
+        else:
+            fg = Image.open(fg_path).convert("RGBA")
+            pos = merge_position(settings["position_mode"], settings["custom_pos"], bg_size, fg.size)
+        if settings["opacity"] < 100 and compositor.blend_mode is None:
+            alpha = fg.getchannel("A").point(_opacity_lut(settings["opacity"]))
+            if shared:
+                fg = fg.copy()
+            fg.putalpha(alpha)
+        if settings["merge_mode"] == "混合":
+            if fg.size != bg_size:
+                return f"尺寸 {fg.size} 与背景尺寸不一致，无法混合，跳过"
+            compositor.blend(fg, settings["opacity"] / 100).save(out_path)
+        else:
+            with compositor.composite(fg, pos) as composite:
+                composite.save(out_path)
+        return None
+    except Exception as e:
+        return str(e)
+
+# 每个工作进程持有的共享背景与合成引擎
+_worker = {}
+
+def _init_merge_worker(shm_name, size, settings):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # RGBX 布局可由 frombuffer 直接映射共享内存，不复制背景数据
+    background = Image.frombuffer("RGBX", size, shm.buf[:size[0] * size[1] * 4], "raw", "RGBX", 0, 1)
+    _worker["shm"] = shm
+    _worker["compositor"] = Compositor(background, BLEND_MODES.get(settings["merge_mode"]), settings["opacity"] / 100)
+    _worker["settings"] = settings
+    _worker["cache"] = ResizeCache()
+
+def _merge_chunk(jobs):
+    compositor, settings, cache = _worker["compositor"], _worker["settings"], _worker["cache"]
+    return [(fg_file, merge_one(compositor, fg_path, out_path, settings, cache)) for fg_file, fg_path, out_path in jobs]
+
+def frame_image(img, borders, color, padding=0, padding_color="#FFFFFF"):
+    """borders 为 (左, 上, 右, 下) 边框宽度，padding 为图片与边框之间的内边距。
+    画布按边框颜色一次性创建，内边距区域整块填色，图片只粘贴一次；
+    带透明通道的图片以自身透明度为蒙版贴到内边距（或边框）颜色上"""
+    left, top, right, bottom = borders
+    inner_w, inner_h = img.width + 2 * padding, img.height + 2 * padding
+    canvas = Image.new("RGB", (left + inner_w + right, top + inner_h + bottom), color)
+    if padding:
+        canvas.paste(padding_color, (left, top, left + inner_w, top + inner_h))
+    pos = (left + padding, top + padding)
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        canvas.paste(img, pos, mask=img)
+    else:
+        canvas.paste(img if img.mode == "RGB" else img.convert("RGB"), pos)
+    return canvas
+
+def frame_one(src_path, out_path, settings):
+    # 为单张图片添加相框并保存，返回错误信息或 None
+    try:
+        with Image.open(src_path) as img:
+            framed = frame_image(img, settings["borders"], settings["color"], settings["padding"], settings["padding_color"])
+        framed.save(out_path)
+        return None
+    except Exception as e:
+        return str(e)
+
+def _frame_chunk(jobs, settings):
+    return [(name, frame_one(src_path, out_path, settings)) for name, src_path, out_path in jobs]
+
 class MergeFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -68,14 +290,28 @@ class MergeFrame(ttk.Frame):
         self.custom_y = tk.StringVar(value="0")
         self.opacity = tk.IntVar(value=100)
         self.merge_mode = tk.StringVar(value="普通合成")  # 普通合成或混合
+        self.workers = tk.StringVar(value=str(DEFAULT_WORKERS))
         # 添加相框模式参数
         self.frame_width = tk.IntVar(value=20)
         self.frame_color = tk.StringVar(value="#000000")
+        self.frame_per_side = tk.BooleanVar(value=False)
+        self.frame_left = tk.StringVar(value="20")
+        self.frame_top = tk.StringVar(value="20")
+        self.frame_right = tk.StringVar(value="20")
+        self.frame_bottom = tk.StringVar(value="20")
+        self.frame_padding = tk.StringVar(value="0")
+        self.padding_color = tk.StringVar(value="#FFFFFF")
         # 背景为相框模式参数（内嵌区域设置）
         self.inner_left = tk.StringVar(value="50")
         self.inner_top = tk.StringVar(value="50")
         self.inner_width = tk.StringVar(value="400")
         self.inner_height = tk.StringVar(value="300")
+        self.auto_window = tk.BooleanVar(value=True)
+        # 内嵌区域输入框对应的背景图：识别结果填入或手动修改后记录，合成时以输入框为准，不再重新识别覆盖
+        self.window_source = None
+        self.filling_window = False
+        for var in (self.inner_left, self.inner_top, self.inner_width, self.inner_height):
+            var.trace_add("write", self.on_window_edit)
         # 背景尺寸显示
         self.bg_dimensions = tk.StringVar(value="未读取")
         self.create_widgets()
@@ -146,15 +382,24 @@ class MergeFrame(ttk.Frame):
         mode_frame2 = ttk.Frame(self.merge_settings)
         mode_frame2.grid(row=6, column=0, columnspan=2, sticky="w", pady=2)
         ttk.Label(mode_frame2, text="合成模式：").pack(side=tk.LEFT)
-        merge_options = ["普通合成", "混合"]
+        merge_options = ["普通合成", "混合"] + list(BLEND_MODES)
         self.mode_merge_cb = ttk.Combobox(mode_frame2, values=merge_options, state="readonly",
                                           textvariable=self.merge_mode, width=10)
         self.mode_merge_cb.pack(side=tk.LEFT, padx=5)
         self.help_label = ttk.Label(mode_frame2, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 12, "bold"))
         self.help_label.pack(side=tk.LEFT, padx=3)
         help_text = ("普通合成：直接将前景粘贴到背景，利用前景透明通道决定显示区域。\n"
-                     "混合模式：背景与前景按比例混合，产生渐变效果（要求尺寸一致）。")
+                     "混合模式：背景与前景按比例混合，产生渐变效果（要求尺寸一致）。\n"
+                     "正片叠底/滤色/叠加/柔光/线性减淡/差值：图层混合模式，只在前景区域内计算，\n"
+                     "前景透明通道与透明度设置一并生效。")
         ToolTip(self.help_label, help_text)
+        workers_frame = ttk.Frame(self.merge_settings)
+        workers_frame.grid(row=7, column=0, columnspan=2, sticky="w", pady=2)
+        ttk.Label(workers_frame, text="并行进程数：").pack(side=tk.LEFT)
+        ttk.Spinbox(workers_frame, from_=1, to=64, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+        workers_help = ttk.Label(workers_frame, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 12, "bold"))
+        workers_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(workers_help, "大于1时背景只解码一次并放入共享内存，多个进程直接映射使用，\n各进程分片处理前景图；设为1则在单线程中逐个处理。")
 
         # 添加相框模式设置
         self.frame_settings = ttk.LabelFrame(container, text="添加相框设置", padding=10)
@@ -166,6 +411,24 @@ class MergeFrame(ttk.Frame):
         self.frame_color_label = ttk.Label(self.frame_settings, textvariable=self.frame_color, background=self.frame_color.get(), width=10)
         self.frame_color_label.grid(row=0, column=3, sticky="w", padx=5)
         ttk.Button(self.frame_settings, text="选择颜色", command=self.choose_frame_color).grid(row=0, column=4, sticky="w", padx=5)
+        ttk.Checkbutton(self.frame_settings, text="分别设置四边宽度", variable=self.frame_per_side,
+                        command=self.on_per_side_toggle).grid(row=1, column=0, sticky="w", pady=2)
+        self.per_side_frame = ttk.Frame(self.frame_settings)
+        for label, var in (("左：", self.frame_left), ("上：", self.frame_top), ("右：", self.frame_right), ("下：", self.frame_bottom)):
+            ttk.Label(self.per_side_frame, text=label).pack(side=tk.LEFT)
+            ttk.Entry(self.per_side_frame, textvariable=var, width=5).pack(side=tk.LEFT, padx=2)
+        self.per_side_frame.grid(row=1, column=1, columnspan=4, sticky="w", padx=5)
+        self.per_side_frame.grid_remove()
+        ttk.Label(self.frame_settings, text="内边距（像素）：").grid(row=2, column=0, sticky="w", pady=2)
+        ttk.Entry(self.frame_settings, textvariable=self.frame_padding, width=5).grid(row=2, column=1, sticky="w", padx=5)
+        ttk.Label(self.frame_settings, text="内边距颜色：").grid(row=2, column=2, sticky="w", padx=5)
+        self.padding_color_label = ttk.Label(self.frame_settings, textvariable=self.padding_color, background=self.padding_color.get(), width=10)
+        self.padding_color_label.grid(row=2, column=3, sticky="w", padx=5)
+        ttk.Button(self.frame_settings, text="选择颜色", command=self.choose_padding_color).grid(row=2, column=4, sticky="w", padx=5)
+        frame_help = ttk.Label(self.frame_settings, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 12, "bold"))
+        frame_help.grid(row=0, column=5, padx=3)
+        ToolTip(frame_help, "已选择前景文件夹时，为文件夹中的每张图片添加相框（与合成共用并行进程数设置）；\n"
+                            "未选择时只为背景图添加相框。内边距为图片与相框之间的留白。")
         self.frame_settings.grid_remove()
 
         # 背景为相框模式设置
@@ -183,6 +446,12 @@ class MergeFrame(ttk.Frame):
         ttk.Label(self.bgframe_settings, text="区域高度：").grid(row=1, column=2, sticky="w")
         self.entry_inner_height = ttk.Entry(self.bgframe_settings, textvariable=self.inner_height, width=5)
         self.entry_inner_height.grid(row=1, column=3, padx=5)
+        ttk.Checkbutton(self.bgframe_settings, text="自动识别内嵌区域", variable=self.auto_window).grid(row=2, column=0, columnspan=2, sticky="w", pady=2)
+        ttk.Button(self.bgframe_settings, text="立即识别", command=self.detect_window).grid(row=2, column=2, sticky="w")
+        window_help = ttk.Label(self.bgframe_settings, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 12, "bold"))
+        window_help.grid(row=2, column=3, padx=3)
+        ToolTip(window_help, "以背景图中心为起点，识别透明或纯色的内嵌区域，结果随背景图缓存。\n"
+                             "识别失败时使用上方手动设置的区域。")
         self.bgframe_settings.grid_remove()
 
         # 日志与进度显示
@@ -213,6 +482,14 @@ class MergeFrame(ttk.Frame):
             self.merge_settings.grid()
             self.bgframe_settings.grid()
             self.frame_settings.grid_remove()
+            if self.bg_path and self.auto_window.get():
+                self.detect_window()
+
+    def on_per_side_toggle(self):
+        if self.frame_per_side.get():
+            self.per_side_frame.grid()
+        else:
+            self.per_side_frame.grid_remove()
 
     def on_pos_change(self, event=None):
         if self.position_mode.get() == "自定义":
@@ -227,11 +504,42 @@ class MergeFrame(ttk.Frame):
             self.bg_entry.delete(0, tk.END)
             self.bg_entry.insert(0, path)
             try:
-                with Image.open(path) as img:
-                    w, h = img.size
-                    self.bg_dimensions.set(f"{w} x {h}")
+                w, h = image_info(path)[:2]
+                self.bg_dimensions.set(f"{w} x {h}")
             except Exception as e:
                 self.bg_dimensions.set("读取失败")
+                return
+            if self.operation_mode.get() == "背景为相框" and self.auto_window.get():
+                self.detect_window()
+
+    def on_window_edit(self, *args):
+        if not self.filling_window:
+            self.window_source = self.bg_path
+
+    def detect_window(self):
+        # 识别背景图的内嵌区域并填入手动设置框
+        if not self.bg_path:
+            messagebox.showerror("错误", "请先选择背景图")
+            return
+        try:
+            window = inner_window(self.bg_path)
+        except Exception as e:
+            self.message_queue.put(("error", f"识别内嵌区域失败：{str(e)}"))
+            return
+        if window is None:
+            self.message_queue.put(("info", "未能识别内嵌区域，请手动设置"))
+            return
+        left, top, right, bottom = window
+        self.filling_window = True
+        try:
+            self.inner_left.set(str(left))
+            self.inner_top.set(str(top))
+            self.inner_width.set(str(right - left))
+            self.inner_height.set(str(bottom - top))
+        finally:
+            self.filling_window = False
+        self.window_source = self.bg_path
+        self.message_queue.put(("info", f"已识别内嵌区域：{window}"))
 
     def select_fg(self):
         folder = filedialog.askdirectory(title="选择前景文件夹")
@@ -257,6 +565,12 @@ class MergeFrame(ttk.Frame):
             self.frame_color.set(color[1])
             self.frame_color_label.config(text=color[1], background=color[1])
 
+    def choose_padding_color(self):
+        color = colorchooser.askcolor(initialcolor=self.padding_color.get())
+        if color[1]:
+            self.padding_color.set(color[1])
+            self.padding_color_label.config(text=color[1], background=color[1])
+
     def setup_queue(self):
         import queue
         self.message_queue = queue.Queue()
@@ -265,50 +579,145 @@ class MergeFrame(ttk.Frame):
     def process_messages(self):
         while not self.message_queue.empty():
             msg_type, content = self.message_queue.get()
-            self.log_area.insert(tk.END, content + "\n")
-            self.log_area.see(tk.END)
+            # 进度消息的内容是已完成数，只更新进度条，不写入日志
             if msg_type == "progress":
                 self.progress_bar["value"] = content
                 self.status_var.set(f"进度: {content}/{self.progress_bar['maximum']}")
+                continue
+            self.log_area.insert(tk.END, content + "\n")
+            self.log_area.see(tk.END)
         self.after(100, self.process_messages)
 
     def start_merge(self):
-        if not self.bg_path:
-            messagebox.showerror("错误", "请先选择背景图")
-            return
         mode = self.operation_mode.get()
-        if mode in ["合成", "添加相框"]:
-            if not self.fg_folder:
-                messagebox.showerror("错误", "请先选择前景文件夹")
+        if mode == "添加相框":
+            # 有前景文件夹时批量添加相框，否则只处理背景图
+            if not self.fg_folder and not self.bg_path:
+                messagebox.showerror("错误", "请先选择前景文件夹或背景图")
                 return
+        elif not self.bg_path:
+            messagebox.showerror("错误", "请先选择背景图")
+            return
+        elif mode == "合成" and not self.fg_folder:
+            messagebox.showerror("错误", "请先选择前景文件夹")
+            return
         if not self.out_folder:
             self.out_folder = self.fg_folder if self.fg_folder else os.path.dirname(self.bg_path)
             self.out_entry.delete(0, tk.END)
             self.out_entry.insert(0, self.out_folder)
         threading.Thread(target=self.process_merge, daemon=True).start()
 
+    def iter_parallel(self, jobs, workers, task, *args, initializer=None, initargs=()):
+        # 按分片把 jobs 分发到多个进程，task(分片, *args) 返回 [(文件名, 错误或 None)]，逐个产出结果
+        chunk = max(1, min(MERGE_CHUNK, len(jobs) // (workers * 4) or 1))
+        chunks = [jobs[i:i + chunk] for i in range(0, len(jobs), chunk)]
+        self.message_queue.put(("info", f"使用 {workers} 个进程并行处理，共 {len(chunks)} 个分片"))
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+            futures = [pool.submit(task, part, *args) for part in chunks]
+            for future in as_completed(futures):
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    # 工作进程异常退出时，该分片内的文件全部记为失败
+                    for name, src_path, out_path in chunks[futures.index(future)]:
+                        yield name, str(e)
+
+    def iter_merge_parallel(self, bg, jobs, settings, workers):
+        # 背景只解码、转换一次并放入共享内存，各工作进程零拷贝映射后按分片处理前景
+        with bg.convert("RGBX") as background:
+            data = background.tobytes()
+        # Windows、macOS 上共享内存会按页大小向上取整，只写入前 len(data) 字节
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            del data
+            yield from self.iter_parallel(jobs, workers, _merge_chunk, initializer=_init_merge_worker,
+                                          initargs=(shm.name, bg.size, settings))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def get_workers(self):
+        try:
+            return int(self.workers.get())
+        except:
+            return 1
+
+    def report_results(self, results, action):
+        # 逐个记录结果并更新进度，返回成功数量
+        processed = 0
+        for idx, (name, err) in enumerate(results, start=1):
+            if err is None:
+                self.message_queue.put(("info", f"{action}成功: {name}"))
+                processed += 1
+            else:
+                self.message_queue.put(("error", f"{name} {action}失败: {err}"))
+            self.message_queue.put(("progress", idx))
+        return processed
+
+    def process_framing(self):
+        try:
+            if self.frame_per_side.get():
+                borders = tuple(int(v.get()) for v in (self.frame_left, self.frame_top, self.frame_right, self.frame_bottom))
+            else:
+                borders = (int(self.frame_width.get()),) * 4
+            padding = int(self.frame_padding.get())
+            if min(borders) < 0 or padding < 0:
+                raise ValueError
+        except:
+            self.message_queue.put(("error", "相框宽度或内边距无效"))
+            return
+        settings = {
+            "borders": borders,
+            "color": self.frame_color.get() if self.frame_color.get().startswith("#") else "#000000",
+            "padding": padding,
+            "padding_color": self.padding_color.get() if self.padding_color.get().startswith("#") else "#FFFFFF",
+        }
+        if self.fg_folder:
+            names = [f for f in os.listdir(self.fg_folder) if f.lower().endswith(SUPPORTED_EXTS)]
+            jobs = [(name, os.path.join(self.fg_folder, name), os.path.join(self.out_folder, name)) for name in names]
+        else:
+            name = os.path.basename(self.bg_path)
+            jobs = [(name, self.bg_path, os.path.join(self.out_folder, name))]
+        total = len(jobs)
+        self.progress_bar["maximum"] = total
+        self.message_queue.put(("info", f"相框宽度（左、上、右、下）：{borders}，内边距：{padding}"))
+        workers = self.get_workers()
+        if workers > 1 and total > 1:
+            results = self.iter_parallel(jobs, workers, _frame_chunk, settings)
+        else:
+            results = ((name, frame_one(src_path, out_path, settings)) for name, src_path, out_path in jobs)
+        processed = self.report_results(results, "添加相框")
+        self.message_queue.put(("info", f"相框添加完成！成功处理 {processed} 个文件，共 {total} 个文件"))
+
     def process_merge(self):
         mode = self.operation_mode.get()
         try:
+            if mode == "添加相框":
+                self.process_framing()
+                return
             bg = Image.open(self.bg_path).convert("RGBA")
             bg_width, bg_height = bg.size
             self.message_queue.put(("info", f"背景图尺寸：{bg_width} x {bg_height}"))
-            if mode == "添加相框":
-                try:
-                    frame_w = int(self.frame_width.get())
-                except:
-                    self.message_queue.put(("error", "相框宽度无效"))
-                    return
-                f_color = self.frame_color.get() if self.frame_color.get().startswith("#") else "#000000"
-                framed = ImageOps.expand(bg, border=frame_w, fill=f_color)
-                new_w, new_h = framed.size
-                self.message_queue.put(("info", f"添加相框后尺寸：{new_w} x {new_h}"))
-                out_path = os.path.join(self.out_folder, os.path.basename(self.bg_path))
-                framed.convert("RGB").save(out_path)
-                self.message_queue.put(("info", f"相框添加成功，保存至：{out_path}"))
-            else:
-                # 合成模式或背景为相框模式
-                if mode == "背景为相框":
+            settings = {
+                "auto_adjust": self.auto_adjust.get(),
+                "position_mode": self.position_mode.get(),
+                "custom_pos": (self.custom_x.get(), self.custom_y.get()),
+                "opacity": self.opacity.get(),
+                "merge_mode": self.merge_mode.get(),
+                "target_region": None,
+            }
+            if mode == "背景为相框":
+                fields = (self.inner_left.get(), self.inner_top.get(), self.inner_width.get(), self.inner_height.get())
+                # 输入框已填入当前背景的识别结果或被手动修改过时直接使用，只有输入框为空或未针对当前背景设置过才重新识别
+                stale = self.window_source != self.bg_path or not all(v.strip() for v in fields)
+                window = inner_window(self.bg_path) if self.auto_window.get() and stale else None
+                if window:
+                    settings["target_region"] = window
+                    self.message_queue.put(("info", f"自动识别内嵌区域：{window}"))
+                else:
+                    if self.auto_window.get() and stale:
+                        self.message_queue.put(("info", "未能识别内嵌区域，使用手动设置的区域"))
                     try:
                         inner_left = int(self.inner_left.get())
                         inner_top = int(self.inner_top.get())
@@ -317,58 +726,22 @@ class MergeFrame(ttk.Frame):
                     except:
                         self.message_queue.put(("error", "内嵌区域参数无效"))
                         return
-                    target_region = (inner_left, inner_top, inner_left + inner_width, inner_top + inner_height)
-                    self.message_queue.put(("info", f"内嵌区域设置：{target_region}"))
-                fg_files = [f for f in os.listdir(self.fg_folder) if f.lower().endswith(SUPPORTED_EXTS)]
-                total = len(fg_files)
-                self.progress_bar["maximum"] = total
-                processed = 0
-                for idx, fg_file in enumerate(fg_files, start=1):
-                    fg_path = os.path.join(self.fg_folder, fg_file)
-                    try:
-                        fg = Image.open(fg_path).convert("RGBA")
-                        if self.auto_adjust.get():
-                            fg = fg.resize((bg_width, bg_height), Image.LANCZOS)
-                            pos = (0, 0)
-                        else:
-                            if mode == "背景为相框":
-                                pos = (target_region[0], target_region[1])
-                                fg = fg.resize((inner_width, inner_height), Image.LANCZOS)
-                            else:
-                                if self.position_mode.get() == "居中":
-                                    pos = ((bg_width - fg.width) // 2, (bg_height - fg.height) // 2)
-                                elif self.position_mode.get() == "左上角":
-                                    pos = (0, 0)
-                                elif self.position_mode.get() == "右下角":
-                                    pos = (bg_width - fg.width, bg_height - fg.height)
-                                elif self.position_mode.get() == "自定义":
-                                    try:
-                                        pos = (int(self.custom_x.get()), int(self.custom_y.get()))
-                                    except:
-                                        pos = ((bg_width - fg.width) // 2, (bg_height - fg.height) // 2)
-                                else:
-                                    pos = ((bg_width - fg.width) // 2, (bg_height - fg.height) // 2)
-                        if self.opacity.get() < 100:
-                            alpha = fg.split()[3]
-                            alpha = alpha.point(lambda p: int(p * (self.opacity.get() / 100)))
-                            fg.putalpha(alpha)
-                        if self.merge_mode.get() == "混合":
-                            if fg.size != (bg_width, bg_height):
-                                self.message_queue.put(("error", f"{fg_file} 尺寸 {fg.size} 与背景尺寸不一致，无法混合，跳过"))
-                                continue
-                            factor = self.opacity.get() / 100
-                            composite = Image.blend(bg, fg, factor)
-                        else:
-                            composite = bg.copy()
-                            composite.paste(fg, pos, mask=fg)
-                        out_path = os.path.join(self.out_folder, fg_file)
-                        composite.convert("RGB").save(out_path)
-                        self.message_queue.put(("info", f"合成成功: {fg_file}"))
-                        processed += 1
-                    except Exception as e:
-                        self.message_queue.put(("error", f"{fg_file} 合成失败: {str(e)}"))
-                    self.message_queue.put(("progress", idx))
-                self.message_queue.put(("info", f"合成完成！成功合成 {processed} 个文件，共 {total} 个文件"))
+                    settings["target_region"] = (inner_left, inner_top, inner_left + inner_width, inner_top + inner_height)
+                    self.message_queue.put(("info", f"内嵌区域设置：{settings['target_region']}"))
+            workers = self.get_workers()
+            fg_files = [f for f in os.listdir(self.fg_folder) if f.lower().endswith(SUPPORTED_EXTS)]
+            total = len(fg_files)
+            self.progress_bar["maximum"] = total
+            jobs = [(fg_file, os.path.join(self.fg_folder, fg_file), os.path.join(self.out_folder, fg_file)) for fg_file in fg_files]
+            if workers > 1 and total > 1:
+                results = self.iter_merge_parallel(bg, jobs, settings, workers)
+            else:
+                # 背景只转换一次，之后每张图只处理前景覆盖的区域
+                compositor = Compositor(bg.convert("RGB"), BLEND_MODES.get(settings["merge_mode"]), settings["opacity"] / 100)
+                cache = ResizeCache()
+                results = ((fg_file, merge_one(compositor, fg_path, out_path, settings, cache)) for fg_file, fg_path, out_path in jobs)
+            processed = self.report_results(results, "合成")
+            self.message_queue.put(("info", f"合成完成！成功合成 {processed} 个文件，共 {total} 个文件"))
             bg.close()
         except Exception as e:
             self.message_queue.put(("error", f"全局错误: {str(e)}"))
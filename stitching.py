@@ -5,6 +5,232 @@ import os
 import threading
 import queue
 import re
+import json
+from collections import deque
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from strips import open_strip_writer, STRIP_FORMATS
+from atlas import pack_sprites
+from image_index import get_index, image_info
+
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+DEFAULT_WORKERS = min(32, os.cpu_count() or 1)
+
+def shrink_to_fit(img, cell_size):
+    # 缩小到恰好放入单元格：先用 reduce 做整数倍的快速缩小，剩余不足两倍的部分再用 LANCZOS 精细重采样
+    scale = min(cell_size[0] / img.width, cell_size[1] / img.height)
+    if scale >= 1:
+        return img
+    target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor >= 2:
+        reduced = img.reduce(factor)
+        img.close()
+        img = reduced
+    if img.size != target:
+        resized = img.resize(target, Image.LANCZOS)
+        img.close()
+        img = resized
+    return img
+
+def load_tile(path, mode, cell_size=None):
+    # 完整解码并转换模式，解码结束后文件句柄即被释放；
+    # 指定 cell_size 时按缩略图解码：JPEG 通过 draft 让解码器直接输出 1/2~1/8 尺寸，再缩小到单元格内
+    img = Image.open(path)
+    if cell_size:
+        img.draft(None, cell_size)
+    img.load()
+    if cell_size:
+        if img.mode not in ("L", "LA", "RGB", "RGBA"):
+            converted = img.convert(mode)
+            img.close()
+            img = converted
+        img = shrink_to_fit(img, cell_size)
+    if img.mode != mode:
+        converted = img.convert(mode)
+        img.close()
+        return converted
+    return img
+
+def iter_tiles(paths, mode, workers=DEFAULT_WORKERS, cell_size=None):
+    # 按输入顺序逐个产出 (图片, 异常)，解码在线程池中并行进行；
+    # 在途任务数限制为线程数的两倍，避免一次性把所有图片解码进内存
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        path_iter = iter(paths)
+        def submit_next():
+            for path in path_iter:
+                pending.append(pool.submit(load_tile, path, mode, cell_size))
+                return
+        for _ in range(max(1, workers) * 2):
+            submit_next()
+        while pending:
+            future = pending.popleft()
+            submit_next()
+            try:
+                yield future.result(), None
+            except Exception as e:
+                yield None, e
+
+def _no_report(msg_type, content):
+    pass
+
+class _SheetReport:
+    # 批量拼接时在子进程中回报进度和错误：附上拼图序号放入 Manager 队列，由界面线程汇总；
+    # 逐张图片的加载日志在多个进程间交错意义不大，不再转发
+    def __init__(self, queue, number):
+        self.queue = queue
+        self.number = number
+
+    def __call__(self, msg_type, content):
+        if msg_type in ("progress", "error"):
+            self.queue.put((self.number, msg_type, content))
+
+def _cell_offset(img, cell_width, cell_height, centered):
+    # 缩略图模式下图片在单元格内居中，普通模式保持左上角对齐
+    if not centered:
+        return 0, 0
+    return (cell_width - img.width) // 2, (cell_height - img.height) // 2
+
+def stitch_grid(paths, output_path, rows, cols, mode, fill_color, fmt, cell_size=None,
+                streaming=False, workers=1, report=_no_report):
+    # 把 paths 按顺序拼接为一张 rows x cols 的网格图并保存，返回使用的空白图片数量；
+    # report(消息类型, 内容) 用于回报日志和进度。该函数不依赖界面状态，可在子进程中执行
+    if cell_size:
+        img_width, img_height = cell_size
+    else:
+        img_width, img_height = image_info(paths[0])[:2]
+    if streaming:
+        return _stitch_bands(paths, output_path, rows, cols, img_width, img_height, mode, fill_color,
+                             fmt, cell_size, workers, report)
+    return _stitch_canvas(paths, output_path, rows, cols, img_width, img_height, mode, fill_color,
+                          cell_size, workers, report)
+
+def _stitch_canvas(paths, output_path, rows, cols, img_width, img_height, mode, fill_color, cell_size, workers, report):
+    total_needed = rows * cols
+    progress_current = 0
+    images = []
+    blank_count = 0
+    blank_image = Image.new(mode, (img_width, img_height), fill_color)
+    canvas = None
+    try:
+        # 并行加载图片（不足部分用空图片补充），结果仍按自然排序顺序返回
+        tiles = iter_tiles(paths[:total_needed], mode, workers, cell_size)
+        for i in range(total_needed):
+            if i < len(paths):
+                filename = os.path.basename(paths[i])
+                img, err = next(tiles)
+                if err is None:
+                    images.append(img)
+                    report("info", f"已加载图片：{filename} ({i+1}/{total_needed})")
+                else:
+                    images.append(blank_image.copy())
+                    blank_count += 1
+                    report("error", f"加载失败：{filename} - 用空白替代 ({i+1}/{total_needed})")
+            else:
+                images.append(blank_image.copy())
+                blank_count += 1
+                report("info", f"补充空白图片 ({i+1}/{total_needed})")
+            progress_current += 1
+            report("progress", progress_current)
+
+        # 创建画布进行拼接
+        canvas = Image.new(mode, (cols * img_width, rows * img_height), fill_color)
+
+        count = 0
+        for row in range(rows):
+            for col in range(cols):
+                index = row * cols + col
+                if index < len(images):
+                    dx, dy = _cell_offset(images[index], img_width, img_height, bool(cell_size))
+                    position = (col * img_width + dx, row * img_height + dy)
+                    canvas.paste(images[index], position)
+                    count += 1
+                    report("info", f"正在拼接：第{row+1}行 第{col+1}列 ({count}/{total_needed})")
+                progress_current += 1
+                report("progress", progress_current)
+
+        canvas.save(output_path, quality=95)
+    finally:
+        for img in images:
+            img.close()
+        blank_image.close()
+        if canvas is not None:
+            canvas.close()
+    return blank_count
+
+def _stitch_bands(paths, output_path, rows, cols, img_width, img_height, mode, fill_color, fmt, cell_size, workers, report):
+    # 逐行解码图片并拼成一个行条带，写出后立即释放，峰值内存约为一个条带加编码缓冲
+    total_needed = rows * cols
+    progress_current = 0
+    blank_count = 0
+    canvas_size = (cols * img_width, rows * img_height)
+    # 解码线程按顺序预取后续图片，与条带拼接和编码重叠进行
+    tiles = iter_tiles(paths[:total_needed], mode, workers, cell_size)
+    with open_strip_writer(output_path, canvas_size[0], canvas_size[1], mode, fmt, workers) as writer:
+        for row in range(rows):
+            band = Image.new(mode, (canvas_size[0], img_height), fill_color)
+            for col in range(cols):
+                index = row * cols + col
+                if index < len(paths):
+                    filename = os.path.basename(paths[index])
+                    img, err = next(tiles)
+                    if err is None:
+                        dx, dy = _cell_offset(img, img_width, img_height, bool(cell_size))
+                        band.paste(img, (col * img_width + dx, dy))
+                        img.close()
+                        report("info", f"已拼接图片：{filename} 第{row+1}行 第{col+1}列 ({index+1}/{total_needed})")
+                    else:
+                        blank_count += 1
+                        report("error", f"加载失败：{filename} - 用空白替代 ({index+1}/{total_needed})")
+                else:
+                    blank_count += 1
+                    report("info", f"补充空白图片 ({index+1}/{total_needed})")
+                progress_current += 1
+                report("progress", progress_current)
+            writer.write(band)
+            band.close()
+    return blank_count
+
+def build_atlas(paths, output_path, max_size, padding, power_of_two, workers=1, report=_no_report):
+    # 按图片实际尺寸装箱生成图集（超出一页时自动分页），并写出记录每个精灵位置的 JSON 清单；
+    # 装箱只读取文件头获取尺寸，绘制时再按页并行解码。返回图集页数
+    infos, errors = get_index().scan(paths)
+    for path, e in errors.items():
+        report("error", f"读取失败：{os.path.basename(path)} - {str(e)}")
+    sizes = {path: (info.width, info.height) for path, info in infos.items()}
+    pages, oversized = pack_sprites(sizes, max_size, padding, power_of_two)
+    for path in oversized:
+        report("error", f"{os.path.basename(path)} 尺寸 {sizes[path]} 超过图集最大尺寸 {max_size}，已跳过")
+    base, ext = os.path.splitext(output_path)
+    manifest = {"pages": [], "sprites": {}}
+    done = 0
+    for page_index, page in enumerate(pages):
+        page_path = output_path if len(pages) == 1 else f"{base}_{page_index + 1}{ext}"
+        canvas = Image.new("RGBA", (page["width"], page["height"]), (0, 0, 0, 0))
+        try:
+            placed = list(page["sprites"].items())
+            for (path, (x, y, w, h)), (img, err) in zip(placed, iter_tiles([p for p, _ in placed], "RGBA", workers)):
+                name = os.path.basename(path)
+                if err is None:
+                    canvas.paste(img, (x, y))
+                    img.close()
+                    manifest["sprites"][name] = {"page": page_index, "x": x, "y": y, "w": w, "h": h}
+                else:
+                    report("error", f"加载失败：{name} - {str(err)}")
+                done += 1
+                report("progress", done)
+            canvas.save(page_path)
+        finally:
+            canvas.close()
+        manifest["pages"].append({"file": os.path.basename(page_path), "width": page["width"], "height": page["height"]})
+        report("info", f"已生成图集第 {page_index + 1} 页：{page_path}（{page['width']} x {page['height']}，{len(page['sprites'])} 个精灵）")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return len(pages)
 
 class StitchingFrame(tk.Frame):
     def __init__(self, parent, **kwargs):
@@ -14,7 +240,20 @@ class StitchingFrame(tk.Frame):
         self.output_path = ""
         self.fill_color = tk.StringVar(value="#FFFFFF")
         self.use_transparent = tk.BooleanVar(value=False)
-        self.output_format = tk.StringVar(value="PNG")  # 输出格式选项: PNG 或 JPEG
+        self.output_format = tk.StringVar(value="PNG")  # 输出格式选项: PNG、JPEG、TIFF 或 DZI 瓦片金字塔
+        self.streaming = tk.BooleanVar(value=False)  # 流式拼接：逐行解码并写出，降低内存占用
+        self.workers = DEFAULT_WORKERS  # 并行数：单张拼接时为解码线程数，批量拼接时为进程数
+        # 缩略图模式：固定单元格尺寸，图片缩小解码后居中放入单元格
+        self.contact_sheet = tk.BooleanVar(value=False)
+        self.cell_width = tk.StringVar(value="256")
+        self.cell_height = tk.StringVar(value="256")
+        self.cell_size = None
+        self.batch_mode = tk.BooleanVar(value=False)  # 图片数超过行×列时按顺序生成多张拼图
+        # 图集模式：按图片实际尺寸装箱，适用于尺寸不一的精灵图
+        self.layout_mode = tk.StringVar(value="网格")
+        self.atlas_max_size = tk.StringVar(value="2048")
+        self.atlas_padding = tk.StringVar(value="2")
+        self.atlas_pot = tk.BooleanVar(value=False)
 
         self.create_widgets()
         self.setup_queue()
@@ -43,6 +282,32 @@ class StitchingFrame(tk.Frame):
         self.col_spin = ttk.Spinbox(grid_frame, from_=1, to=20, width=5)
         self.col_spin.set(4)
         self.col_spin.pack(side=tk.LEFT, padx=5)
+        ttk.Label(grid_frame, text="并行数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.worker_spin = ttk.Spinbox(grid_frame, from_=1, to=64, width=5)
+        self.worker_spin.set(DEFAULT_WORKERS)
+        self.worker_spin.pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(grid_frame, text="批量模式(超出行×列时生成多张)", variable=self.batch_mode).pack(side=tk.LEFT, padx=10)
+        
+        # 缩略图模式设置
+        sheet_frame = ttk.Frame(control_frame)
+        sheet_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Checkbutton(sheet_frame, text="缩略图模式(固定单元格)", variable=self.contact_sheet).pack(side=tk.LEFT)
+        ttk.Label(sheet_frame, text="单元格宽:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(sheet_frame, textvariable=self.cell_width, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(sheet_frame, text="单元格高:").pack(side=tk.LEFT)
+        ttk.Entry(sheet_frame, textvariable=self.cell_height, width=6).pack(side=tk.LEFT, padx=5)
+        
+        # 图集模式设置
+        atlas_frame = ttk.Frame(control_frame)
+        atlas_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(atlas_frame, text="拼接方式:").pack(side=tk.LEFT)
+        ttk.Radiobutton(atlas_frame, text="网格", variable=self.layout_mode, value="网格").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(atlas_frame, text="图集(紧凑装箱)", variable=self.layout_mode, value="图集").pack(side=tk.LEFT, padx=5)
+        ttk.Label(atlas_frame, text="图集最大尺寸:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(atlas_frame, values=["512", "1024", "2048", "4096", "8192"], textvariable=self.atlas_max_size, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(atlas_frame, text="间距:").pack(side=tk.LEFT)
+        ttk.Entry(atlas_frame, textvariable=self.atlas_padding, width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(atlas_frame, text="尺寸为2的幂", variable=self.atlas_pot).pack(side=tk.LEFT, padx=5)
         
         # 输出格式设置
         output_frame = ttk.Frame(control_frame)
@@ -52,6 +317,11 @@ class StitchingFrame(tk.Frame):
         self.radio_png.pack(side=tk.LEFT, padx=5)
         self.radio_jpeg = ttk.Radiobutton(output_frame, text="JPEG", variable=self.output_format, value="JPEG")
         self.radio_jpeg.pack(side=tk.LEFT, padx=5)
+        self.radio_tiff = ttk.Radiobutton(output_frame, text="TIFF", variable=self.output_format, value="TIFF")
+        self.radio_tiff.pack(side=tk.LEFT, padx=5)
+        self.radio_dzi = ttk.Radiobutton(output_frame, text="DZI瓦片金字塔", variable=self.output_format, value="DZI")
+        self.radio_dzi.pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(output_frame, text="流式拼接(低内存，仅PNG/TIFF)", variable=self.streaming).pack(side=tk.LEFT, padx=10)
         
         # 透明背景与填充色设置
         fill_frame = ttk.Frame(control_frame)
@@ -144,20 +414,54 @@ class StitchingFrame(tk.Frame):
         except Exception as e:
             messagebox.showerror("错误", "行数和列数请输入有效的正整数")
             return
+        try:
+            self.workers = max(1, int(self.worker_spin.get()))
+        except Exception as e:
+            messagebox.showerror("错误", "并行数请输入有效的正整数")
+            return
+        self.cell_size = None
+        if self.contact_sheet.get():
+            try:
+                self.cell_size = (int(self.cell_width.get()), int(self.cell_height.get()))
+                if min(self.cell_size) <= 0:
+                    raise ValueError
+            except Exception as e:
+                messagebox.showerror("错误", "单元格宽高请输入有效的正整数")
+                return
         # 根据输出格式设置默认扩展名和文件类型
         fmt = self.output_format.get()
         if fmt == "PNG":
             def_ext = ".png"
             filetypes = [("PNG 文件", "*.png")]
+        elif fmt == "TIFF":
+            def_ext = ".tif"
+            filetypes = [("TIFF 文件", "*.tif;*.tiff")]
+        elif fmt == "DZI":
+            def_ext = ".dzi"
+            filetypes = [("Deep Zoom 描述文件", "*.dzi")]
         else:
             def_ext = ".jpg"
             filetypes = [("JPEG 文件", "*.jpg")]
+        if self.streaming.get() and fmt not in STRIP_FORMATS:
+            messagebox.showerror("错误", "流式拼接仅支持PNG或TIFF输出")
+            return
+        if self.layout_mode.get() == "图集":
+            if fmt not in ("PNG", "TIFF"):
+                messagebox.showerror("错误", "图集模式仅支持PNG或TIFF输出")
+                return
+            try:
+                self.atlas_settings = (int(self.atlas_max_size.get()), int(self.atlas_padding.get()))
+                if self.atlas_settings[0] <= 0 or self.atlas_settings[1] < 0:
+                    raise ValueError
+            except Exception as e:
+                messagebox.showerror("错误", "图集最大尺寸和间距请输入有效的整数")
+                return
         self.output_path = filedialog.asksaveasfilename(defaultextension=def_ext, filetypes=filetypes)
         if not self.output_path:
             return
-        # 如果选择了透明背景，确保输出格式为PNG
-        if self.use_transparent.get() and fmt != "PNG":
-            messagebox.showerror("错误", "透明背景仅支持PNG格式，请选择PNG输出")
+        # 如果选择了透明背景，确保输出格式支持透明通道
+        if self.use_transparent.get() and fmt == "JPEG":
+            messagebox.showerror("错误", "透明背景不支持JPEG格式，请选择PNG输出")
             return
         threading.Thread(target=self.stitch_images, daemon=True).start()
     
@@ -166,24 +470,13 @@ class StitchingFrame(tk.Frame):
             # 获取图片文件列表，并自然排序
             image_files = [f for f in os.listdir(self.input_folder)
                            if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            def natural_sort_key(s):
-                return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
             image_files.sort(key=natural_sort_key)
             
             total_needed = self.rows * self.cols
-            overall_steps = 2 * total_needed  # 加载和拼接各占一半
-            self.message_queue.put(("progress", 0))
-            self.after(0, lambda: self.progress_bar.config(maximum=overall_steps))
-            progress_current = 0
+            # DZI 金字塔始终按条带直接由源图生成，不构建完整画布
+            streaming = self.streaming.get() or self.output_format.get() == "DZI"
 
-            images = []
-            blank_count = 0
-
-            if image_files:
-                first_image = Image.open(os.path.join(self.input_folder, image_files[0]))
-                img_width, img_height = first_image.size
-                first_image.close()
-            else:
+            if not image_files:
                 messagebox.showerror("错误", "未找到有效图片文件")
                 return
 
@@ -195,56 +488,89 @@ class StitchingFrame(tk.Frame):
             else:
                 mode = "RGB"
                 fill_color = tuple(int(self.fill_color.get()[i:i+2], 16) for i in (1,3,5)) if self.fill_color.get().startswith("#") else (255, 255, 255)
-            
-            blank_image = Image.new(mode, (img_width, img_height), fill_color)
 
-            # 加载图片（不足部分用空图片补充）
-            for i in range(total_needed):
-                if i < len(image_files):
-                    filename = image_files[i]
-                    try:
-                        img = Image.open(os.path.join(self.input_folder, filename))
-                        if img.mode != mode:
-                            img = img.convert(mode)
-                        images.append(img)
-                        self.message_queue.put(("info", f"已加载图片：{filename} ({i+1}/{total_needed})"))
-                    except Exception as e:
-                        images.append(blank_image.copy())
-                        blank_count += 1
-                        self.message_queue.put(("error", f"加载失败：{filename} - 用空白替代 ({i+1}/{total_needed})"))
-                else:
-                    images.append(blank_image.copy())
-                    blank_count += 1
-                    self.message_queue.put(("info", f"补充空白图片 ({i+1}/{total_needed})"))
-                progress_current += 1
-                self.message_queue.put(("progress", progress_current))
-            
-            # 创建画布进行拼接
-            canvas = Image.new(mode, (self.cols * img_width, self.rows * img_height), fill_color)
+            paths = [os.path.join(self.input_folder, f) for f in image_files]
+            if self.layout_mode.get() == "图集":
+                self.stitch_atlas(paths)
+                return
+            if len(paths) > total_needed:
+                if self.batch_mode.get():
+                    self.stitch_batch(paths, mode, fill_color, streaming)
+                    return
+                self.message_queue.put(("info", f"仅使用前 {total_needed} 张图片，其余 {len(paths) - total_needed} 张未使用（可启用批量模式生成多张拼图）"))
 
-            count = 0
-            for row in range(self.rows):
-                for col in range(self.cols):
-                    index = row * self.cols + col
-                    if index < len(images):
-                        position = (col * img_width, row * img_height)
-                        canvas.paste(images[index], position)
-                        count += 1
-                        self.message_queue.put(("info", f"正在拼接：第{row+1}行 第{col+1}列 ({count}/{total_needed})"))
-                    progress_current += 1
-                    self.message_queue.put(("progress", progress_current))
-            
-            canvas.save(self.output_path, quality=95)
+            overall_steps = total_needed if streaming else 2 * total_needed  # 非流式时加载和拼接各占一半
+            self.message_queue.put(("progress", 0))
+            self.after(0, lambda: self.progress_bar.config(maximum=overall_steps))
+            blank_count = stitch_grid(paths[:total_needed], self.output_path, self.rows, self.cols, mode, fill_color,
+                                      self.output_format.get(), self.cell_size, streaming, self.workers,
+                                      lambda msg_type, content: self.message_queue.put((msg_type, content)))
             self.message_queue.put(("success", f"拼接完成！保存至：{self.output_path}\n使用空白图片数量：{blank_count}"))
             
-            for img in images:
-                img.close()
-            blank_image.close()
-            
         except Exception as e:
             self.message_queue.put(("error", f"发生错误：{str(e)}"))
-            if 'canvas' in locals():
-                canvas.close()
+
+    def stitch_atlas(self, paths):
+        max_size, padding = self.atlas_settings
+        self.message_queue.put(("progress", 0))
+        self.after(0, lambda: self.progress_bar.config(maximum=len(paths)))
+        page_count = build_atlas(paths, self.output_path, max_size, padding, self.atlas_pot.get(), self.workers,
+                                 lambda msg_type, content: self.message_queue.put((msg_type, content)))
+        manifest_path = os.path.splitext(self.output_path)[0] + ".json"
+        self.message_queue.put(("success", f"图集生成完成！共 {page_count} 页，坐标清单保存至：{manifest_path}"))
+
+    def stitch_batch(self, paths, mode, fill_color, streaming):
+        # 按自然排序把文件切分为连续的多张拼图，在进程池中并行生成，输出文件按序号命名
+        per_sheet = self.rows * self.cols
+        sheets = [paths[i:i + per_sheet] for i in range(0, len(paths), per_sheet)]
+        base, ext = os.path.splitext(self.output_path)
+        digits = len(str(len(sheets)))
+        fmt = self.output_format.get()
+        # 与单张拼接一致按图片计进度：流式时每个单元格一步，非流式时加载和拼接各一步
+        sheet_steps = per_sheet if streaming else 2 * per_sheet
+        self.message_queue.put(("progress", 0))
+        self.after(0, lambda: self.progress_bar.config(maximum=sheet_steps * len(sheets)))
+        self.message_queue.put(("info", f"共 {len(paths)} 张图片，将生成 {len(sheets)} 张拼图"))
+        # 各拼图已完成的步数，子进程通过 Manager 队列逐个单元格回报
+        steps = {}
+        failed = 0
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=self.workers) as pool:
+            reports = manager.Queue()
+
+            def drain():
+                while True:
+                    try:
+                        number, msg_type, content = reports.get_nowait()
+                    except queue.Empty:
+                        break
+                    if msg_type == "progress":
+                        steps[number] = max(steps.get(number, 0), content)
+                    else:
+                        self.message_queue.put((msg_type, f"第 {number} 张拼图：{content}"))
+                self.message_queue.put(("progress", sum(steps.values())))
+
+            futures = {}
+            for number, sheet in enumerate(sheets, start=1):
+                out_path = f"{base}_{number:0{digits}d}{ext}"
+                future = pool.submit(stitch_grid, sheet, out_path, self.rows, self.cols, mode, fill_color,
+                                     fmt, self.cell_size, streaming, 1, _SheetReport(reports, number))
+                futures[future] = (number, out_path)
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                drain()
+                for future in finished:
+                    number, out_path = futures[future]
+                    try:
+                        blank_count = future.result()
+                        self.message_queue.put(("info", f"已生成拼图：{out_path}（空白图片 {blank_count} 张）"))
+                    except Exception as e:
+                        failed += 1
+                        self.message_queue.put(("error", f"拼图生成失败：{out_path} - {str(e)}"))
+                    # 失败的拼图不再有后续回报，直接计为完成
+                    steps[number] = sheet_steps
+            drain()
+        self.message_queue.put(("success", f"批量拼接完成！成功 {len(sheets) - failed} 张，失败 {failed} 张，输出前缀：{base}"))
 
 # 当该模块作为独立文件运行时，启动独立的图片拼接工具
 if __name__ == "__main__":
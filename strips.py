@@ -0,0 +1,546 @@
+import io
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, BmpImagePlugin, PngImagePlugin, TiffImagePlugin, TiffTags
+
+# 按条带（若干整行）增量读写图片，内存中只需保留当前条带，
+# 用于拼接超大画布、缩放或旋转超大图片等无法一次性在内存中构建整图的场景。
+
+STRIP_FORMATS = ("PNG", "TIFF", "DZI")
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+class PngStripWriter:
+    """逐条带写出 PNG：每行使用 None 滤波，压缩数据按 IDAT 块即时落盘"""
+    COLOR_TYPES = {"L": 0, "RGB": 2, "LA": 4, "RGBA": 6}
+
+    def __init__(self, path, width, height, mode, compress_level=6):
+        if mode not in self.COLOR_TYPES:
+            raise ValueError(f"不支持的图像模式：{mode}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.stride = width * len(mode)
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(compress_level)
+        self.fp = open(path, "wb")
+        self.fp.write(b"\x89PNG\r\n\x1a\n")
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, self.COLOR_TYPES[mode], 0, 0, 0)
+        self.fp.write(_png_chunk(b"IHDR", ihdr))
+
+    def write(self, strip):
+        if strip.mode != self.mode or strip.width != self.width:
+            raise ValueError("条带尺寸或模式与输出不一致")
+        raw = memoryview(strip.tobytes())
+        for y in range(strip.height):
+            self._emit(self.compressor.compress(b"\x00"))
+            self._emit(self.compressor.compress(raw[y * self.stride:(y + 1) * self.stride]))
+        self.rows_written += strip.height
+
+    def _emit(self, data):
+        if data:
+            self.fp.write(_png_chunk(b"IDAT", data))
+
+    def close(self):
+        if self.fp is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"写入行数 {self.rows_written} 与图片高度 {self.height} 不一致")
+            self._emit(self.compressor.flush())
+            self.fp.write(_png_chunk(b"IEND", b""))
+        finally:
+            self.fp.close()
+            self.fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+class TiffStripWriter:
+    """逐条带写出 Deflate 压缩的 TIFF，每次 write 即为一个 strip；原始数据超过 4GB 时自动使用 BigTIFF"""
+    PHOTOMETRIC = {"L": 1, "LA": 1, "RGB": 2, "RGBA": 2}
+
+    def __init__(self, path, width, height, mode, compress_level=6):
+        if mode not in self.PHOTOMETRIC:
+            raise ValueError(f"不支持的图像模式：{mode}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.compress_level = compress_level
+        self.rows_per_strip = None
+        self.rows_written = 0
+        self.offsets = []
+        self.byte_counts = []
+        self.bigtiff = width * height * len(mode) >= 0xFFFFFFFF - (1 << 24)
+        self.fp = open(path, "wb")
+        if self.bigtiff:
+            # IFD 偏移在 close 时回填
+            self.fp.write(b"II" + struct.pack("<HHHQ", 43, 8, 0, 0))
+        else:
+            self.fp.write(b"II" + struct.pack("<HI", 42, 0))
+
+    def write(self, strip):
+        if strip.mode != self.mode or strip.width != self.width:
+            raise ValueError("条带尺寸或模式与输出不一致")
+        if self.rows_per_strip is None:
+            self.rows_per_strip = strip.height
+        elif self.byte_counts and strip.height != self.rows_per_strip and self.rows_written + strip.height != self.height:
+            raise ValueError("除最后一个条带外，各条带高度必须一致")
+        data = zlib.compress(strip.tobytes(), self.compress_level)
+        self.offsets.append(self.fp.tell())
+        self.byte_counts.append(len(data))
+        self.fp.write(data)
+        self.rows_written += strip.height
+
+    def close(self):
+        if self.fp is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"写入行数 {self.rows_written} 与图片高度 {self.height} 不一致")
+            self._write_ifd()
+        finally:
+            self.fp.close()
+            self.fp = None
+
+    def _write_ifd(self):
+        bands = len(self.mode)
+        offset_type = 16 if self.bigtiff else 4  # LONG8 / LONG
+        entries = [
+            (256, 4, [self.width]),
+            (257, 4, [self.height]),
+            (258, 3, [8] * bands),
+            (259, 3, [8]),  # Adobe Deflate
+            (262, 3, [self.PHOTOMETRIC[self.mode]]),
+            (273, offset_type, self.offsets),
+            (277, 3, [bands]),
+            (278, 4, [self.rows_per_strip or self.height]),
+            (279, offset_type, self.byte_counts),
+            (284, 3, [1]),
+        ]
+        if self.mode in ("LA", "RGBA"):
+            entries.append((338, 3, [2]))  # 非预乘 alpha
+        if self.fp.tell() % 2:
+            self.fp.write(b"\x00")
+        type_fmt = {3: "H", 4: "I", 16: "Q"}
+        if self.bigtiff:
+            head_fmt, entry_fmt, inline, next_fmt = "<Q", "<HHQ", 8, "<Q"
+        else:
+            head_fmt, entry_fmt, inline, next_fmt = "<H", "<HHI", 4, "<I"
+        entry_size = struct.calcsize(entry_fmt) + inline
+        ifd_offset = self.fp.tell()
+        extra_offset = ifd_offset + struct.calcsize(head_fmt) + entry_size * len(entries) + struct.calcsize(next_fmt)
+        ifd = bytearray(struct.pack(head_fmt, len(entries)))
+        extra = bytearray()
+        for tag, typ, values in entries:
+            payload = struct.pack("<%d%s" % (len(values), type_fmt[typ]), *values)
+            ifd += struct.pack(entry_fmt, tag, typ, len(values))
+            if len(payload) <= inline:
+                ifd += payload.ljust(inline, b"\x00")
+            else:
+                ifd += struct.pack("<Q" if self.bigtiff else "<I", extra_offset + len(extra))
+                extra += payload
+                if len(extra) % 2:
+                    extra += b"\x00"
+        ifd += struct.pack(next_fmt, 0)
+        self.fp.write(ifd)
+        self.fp.write(extra)
+        self.fp.seek(8 if self.bigtiff else 4)
+        self.fp.write(struct.pack("<Q" if self.bigtiff else "<I", ifd_offset))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+class BmpStripWriter:
+    """逐条带写出未压缩 BMP：使用负高度表示行序自上而下，因而可以顺序追加"""
+    BITS = {"L": 8, "RGB": 24}
+
+    def __init__(self, path, width, height, mode):
+        if mode not in self.BITS:
+            raise ValueError(f"不支持的图像模式：{mode}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.stride = (width * self.BITS[mode] // 8 + 3) & ~3
+        self.rows_written = 0
+        palette = b"".join(bytes((i, i, i, 0)) for i in range(256)) if mode == "L" else b""
+        offset = 14 + 40 + len(palette)
+        self.fp = open(path, "wb")
+        self.fp.write(b"BM" + struct.pack("<IHHI", offset + self.stride * height, 0, 0, offset))
+        self.fp.write(struct.pack("<IiiHHIIiiII", 40, width, -height, 1, self.BITS[mode], 0,
+                                  self.stride * height, 2835, 2835, 256 if palette else 0, 0))
+        self.fp.write(palette)
+
+    def write(self, strip):
+        if strip.mode != self.mode or strip.width != self.width:
+            raise ValueError("条带尺寸或模式与输出不一致")
+        self.fp.write(strip.tobytes("raw", ("BGR" if self.mode == "RGB" else "L", self.stride, 1)))
+        self.rows_written += strip.height
+
+    def close(self):
+        if self.fp is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"写入行数 {self.rows_written} 与图片高度 {self.height} 不一致")
+        finally:
+            self.fp.close()
+            self.fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+class _PyramidLevel:
+    # 金字塔中的一层：缓存尚未切片的行，每凑满两行瓦片就切片写出，并把 2 倍缩小后的结果交给下一层
+    def __init__(self, owner, level, width, height):
+        self.owner = owner
+        self.level = level
+        self.width = width
+        self.height = height
+        self.buffer = None
+        self.tile_row = 0
+        os.makedirs(os.path.join(owner.tiles_dir, str(level)), exist_ok=True)
+        self.child = _PyramidLevel(owner, level - 1, (width + 1) // 2, (height + 1) // 2) if level > 0 else None
+
+    def add(self, strip):
+        if self.buffer is not None:
+            merged = Image.new(strip.mode, (self.width, self.buffer.height + strip.height))
+            merged.paste(self.buffer, (0, 0))
+            merged.paste(strip, (0, self.buffer.height))
+            strip, self.buffer = merged, None
+        chunk = 2 * self.owner.tile_size
+        top = 0
+        while strip.height - top >= chunk:
+            self.emit(strip.crop((0, top, self.width, top + chunk)))
+            top += chunk
+        # crop 会复制数据，调用方写出后可立即释放传入的条带
+        if top < strip.height:
+            self.buffer = strip.crop((0, top, self.width, strip.height))
+
+    def finish(self):
+        if self.buffer is not None:
+            block, self.buffer = self.buffer, None
+            self.emit(block)
+        if self.child:
+            self.child.finish()
+
+    def emit(self, block):
+        ts = self.owner.tile_size
+        for y in range(0, block.height, ts):
+            for x in range(0, self.width, ts):
+                tile = block.crop((x, y, min(x + ts, self.width), min(y + ts, block.height)))
+                self.owner.save_tile(tile, self.level, x // ts, self.tile_row)
+            self.tile_row += 1
+        if self.child:
+            self.child.add(block.reduce(2))
+
+class DeepZoomWriter:
+    """逐条带生成 Deep Zoom（DZI）瓦片金字塔：xxx.dzi 描述文件 + xxx_files/<层级>/<列>_<行>.<格式>；
+    每一层都由上一层的条带缩小得到，全程不构建完整分辨率画布，瓦片编码在线程池中进行"""
+
+    def __init__(self, path, width, height, mode, tile_size=256, tile_format=None, workers=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.tile_size = tile_size
+        self.tile_format = tile_format or ("png" if mode in ("LA", "RGBA") else "jpg")
+        self.rows_written = 0
+        self.tiles_dir = os.path.splitext(path)[0] + "_files"
+        max_level = max(width, height, 1).bit_length() - 1
+        if (1 << max_level) < max(width, height):
+            max_level += 1
+        self.max_level = max_level
+        self.workers = workers or min(32, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending = deque()
+        self.top = _PyramidLevel(self, max_level, width, height)
+
+    def write(self, strip):
+        if strip.mode != self.mode or strip.width != self.width:
+            raise ValueError("条带尺寸或模式与输出不一致")
+        self.rows_written += strip.height
+        self.top.add(strip)
+
+    def save_tile(self, tile, level, col, row):
+        tile_path = os.path.join(self.tiles_dir, str(level), f"{col}_{row}.{self.tile_format}")
+        if self.tile_format == "jpg":
+            self.pending.append(self.executor.submit(tile.save, tile_path, "JPEG", quality=90))
+        else:
+            self.pending.append(self.executor.submit(tile.save, tile_path, "PNG"))
+        # 限制排队中的瓦片数量，避免编码跟不上时瓦片堆积在内存中
+        while len(self.pending) > self.workers * 4:
+            self.pending.popleft().result()
+
+    def close(self):
+        if self.executor is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"写入行数 {self.rows_written} 与图片高度 {self.height} 不一致")
+            self.top.finish()
+            while self.pending:
+                self.pending.popleft().result()
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{self.tile_size}" '
+                        f'Overlap="0" Format="{self.tile_format}">\n'
+                        f'  <Size Width="{self.width}" Height="{self.height}"/>\n'
+                        '</Image>\n')
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+def open_strip_writer(path, width, height, mode, fmt, workers=None):
+    """根据输出格式创建条带写出器（PNG、TIFF、BMP 或 DZI 瓦片金字塔）"""
+    if fmt == "PNG":
+        return PngStripWriter(path, width, height, mode)
+    if fmt == "TIFF":
+        return TiffStripWriter(path, width, height, mode)
+    if fmt == "BMP":
+        return BmpStripWriter(path, width, height, mode)
+    if fmt == "DZI":
+        return DeepZoomWriter(path, width, height, mode, workers=workers)
+    raise ValueError(f"流式输出不支持 {fmt} 格式，请选择 PNG、TIFF 或 DZI")
+
+# 条带读取器：read(y0, y1) 返回第 y0 到 y1 行组成的图片，只解码所需的行。
+# 直接使用格式插件类打开文件头，不经过 Image.open 的像素数上限（MAX_IMAGE_PIXELS）检查，
+# 内存占用由调用方每次读取的行数决定。
+
+class PngStripReader:
+    """按行顺序解码非隔行扫描的 8 位 PNG：自行解压 IDAT 数据流，取出所需的若干行后
+    交给 Pillow 的 zip 解码器完成反滤波（首行前补上已解码的上一行，保证 Up/Average/Paeth 滤波正确）。
+    只能向后读取，已丢弃的行不能再次读取"""
+    BYTES = {"L": 1, "P": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+    def __init__(self, path):
+        header = PngImagePlugin.PngImageFile(path)
+        try:
+            if header.info.get("interlace"):
+                raise ValueError("不支持按条带读取隔行扫描的 PNG")
+            if header.mode not in self.BYTES or header.tile[0].args != header.mode:
+                raise ValueError(f"不支持按条带读取该 PNG（模式 {header.mode}）")
+            self.width, self.height = header.size
+            self.mode = header.mode
+            self.format = "PNG"
+            self.palette = header.palette if header.mode == "P" else None
+            self.info = {k: v for k, v in header.info.items() if k == "transparency"}
+        finally:
+            header.close()
+        self.row_bytes = self.width * self.BYTES[self.mode]
+        self.fp = open(path, "rb")
+        self.fp.seek(8)
+        self.idat_left = 0
+        self.tail = b""
+        self.decompressor = zlib.decompressobj()
+        self.pending = bytearray()
+        self.buffer = None  # 已解码但尚未丢弃的行，起始于第 buffer_top 行
+        self.buffer_top = 0
+        self.decoded = 0
+        self.last_row = None
+
+    def _idat(self):
+        # 按块读取 IDAT 数据，单个 IDAT 很大时也不会整块读入内存
+        while self.idat_left == 0:
+            length, tag = struct.unpack(">I4s", self.fp.read(8))
+            if tag == b"IDAT":
+                self.idat_left = length
+            elif tag == b"IEND":
+                raise ValueError("PNG 图像数据不完整")
+            else:
+                self.fp.seek(length + 4, os.SEEK_CUR)
+        data = self.fp.read(min(self.idat_left, 1 << 20))
+        self.idat_left -= len(data)
+        if self.idat_left == 0:
+            self.fp.read(4)  # CRC
+        return data
+
+    def _decode(self, rows):
+        need = rows * (self.row_bytes + 1)
+        while len(self.pending) < need:
+            if not self.tail:
+                self.tail = self._idat()
+            # 限制单次解压输出，高压缩比的数据也只展开所需的部分
+            self.pending += self.decompressor.decompress(self.tail, need - len(self.pending))
+            self.tail = self.decompressor.unconsumed_tail
+        raw = bytes(self.pending[:need])
+        del self.pending[:need]
+        if self.last_row is not None:
+            raw = b"\x00" + self.last_row + raw
+        strip = Image.frombytes(self.mode, (self.width, rows + (self.last_row is not None)), zlib.compress(raw, 0), "zip", self.mode)
+        if self.last_row is not None:
+            strip = strip.crop((0, 1, self.width, strip.height))
+        self.last_row = strip.crop((0, rows - 1, self.width, rows)).tobytes()
+        self.decoded += rows
+        return strip
+
+    def read(self, y0, y1):
+        if y0 < self.buffer_top:
+            raise ValueError("PNG 只能按顺序向后读取")
+        # 丢弃 y0 之前的行
+        if self.buffer is not None:
+            drop = y0 - self.buffer_top
+            if drop >= self.buffer.height:
+                self.buffer = None
+            elif drop > 0:
+                self.buffer = self.buffer.crop((0, drop, self.width, self.buffer.height))
+        self.buffer_top = y0
+        # 跳过从未读取过的行，每次解码约 16MB
+        while self.decoded < y0:
+            self._decode(min(y0 - self.decoded, max(1, (16 << 20) // self.row_bytes)))
+        if self.decoded < y1:
+            strip = self._decode(y1 - self.decoded)
+            if self.buffer is None:
+                self.buffer = strip
+            else:
+                merged = Image.new(self.mode, (self.width, self.buffer.height + strip.height))
+                merged.paste(self.buffer, (0, 0))
+                merged.paste(strip, (0, self.buffer.height))
+                self.buffer = merged
+        result = self.buffer.crop((0, 0, self.width, y1 - y0))
+        if self.palette is not None:
+            result.putpalette(self.palette)
+        result.info.update(self.info)
+        return result
+
+    def close(self):
+        self.fp.close()
+
+class TiffStripReader:
+    """按 strip 读取非分块 TIFF：把覆盖所需行的若干个 strip 的压缩数据原样拷贝到一个小型内存 TIFF 中，
+    再交给 Pillow（libtiff）解码，支持 TIFF 的各种压缩方式和预测器，可随机访问"""
+    COPY_TAGS = (256, 258, 259, 262, 266, 277, 278, 284, 317, 320, 338, 339, 347, 529, 530, 531, 532)
+
+    def __init__(self, path):
+        header = TiffImagePlugin.TiffImageFile(path)
+        try:
+            tags = header.tag_v2
+            if 322 in tags:
+                raise ValueError("不支持按条带读取分块（tiled）TIFF")
+            if tags.get(284, 1) != 1 and tags.get(277, 1) > 1:
+                raise ValueError("不支持按条带读取分平面存储的 TIFF")
+            self.width, self.height = header.size
+            self.mode = header.mode
+            self.format = "TIFF"
+            self.prefix = tags.prefix
+            self.offsets = tags[273]
+            self.byte_counts = tags[279]
+            self.rows_per_strip = min(tags.get(278, self.height), self.height)
+            self.tags = {tag: (tags[tag], tags.tagtype[tag]) for tag in self.COPY_TAGS if tag in tags}
+        finally:
+            header.close()
+        self.fp = open(path, "rb")
+
+    def _ifd(self, rows, offsets, byte_counts):
+        ifd = TiffImagePlugin.ImageFileDirectory_v2(prefix=self.prefix)
+        for tag, (value, tagtype) in self.tags.items():
+            ifd.tagtype[tag] = tagtype
+            ifd[tag] = value
+        for tag, value in ((257, rows), (273, tuple(offsets)), (279, tuple(byte_counts))):
+            ifd.tagtype[tag] = TiffTags.LONG
+            ifd[tag] = value
+        return ifd.tobytes(8)
+
+    def read(self, y0, y1):
+        first = y0 // self.rows_per_strip
+        last = (y1 - 1) // self.rows_per_strip + 1
+        top = first * self.rows_per_strip
+        rows = min(self.height, last * self.rows_per_strip) - top
+        byte_counts = self.byte_counts[first:last]
+        # Pillow 生成 IFD 时会把 StripOffsets 加上 IFD 结束位置，因此这里给出相对 IFD 之后数据区的偏移
+        offsets = [sum(byte_counts[:i]) for i in range(len(byte_counts))]
+        order = "<" if self.prefix == b"II" else ">"
+        buf = io.BytesIO()
+        buf.write(self.prefix + struct.pack(order + "HI", 42, 8))
+        buf.write(self._ifd(rows, offsets, byte_counts))
+        for offset, count in zip(self.offsets[first:last], byte_counts):
+            self.fp.seek(offset)
+            buf.write(self.fp.read(count))
+        buf.seek(0)
+        with Image.open(buf) as strip:
+            strip.load()
+            return strip.crop((0, y0 - top, self.width, y1 - top))
+
+    def close(self):
+        self.fp.close()
+
+class BmpStripReader:
+    """按行读取未压缩 BMP：按偏移直接读取所需行的原始数据，可随机访问"""
+
+    def __init__(self, path):
+        header = BmpImagePlugin.BmpImageFile(path)
+        try:
+            tile = header.tile[0]
+            if len(header.tile) != 1 or tile.codec_name != "raw":
+                raise ValueError("不支持按条带读取压缩的 BMP")
+            self.width, self.height = header.size
+            self.mode = header.mode
+            self.format = "BMP"
+            self.palette = header.palette if header.mode == "P" else None
+            self.offset = tile.offset
+            self.rawmode, self.stride, self.direction = tile.args
+        finally:
+            header.close()
+        self.fp = open(path, "rb")
+
+    def read(self, y0, y1):
+        # 自下而上存储（direction 为 -1）时，第 y 行位于文件中倒数第 y 行的位置
+        if self.direction < 0:
+            self.fp.seek(self.offset + (self.height - y1) * self.stride)
+        else:
+            self.fp.seek(self.offset + y0 * self.stride)
+        data = self.fp.read((y1 - y0) * self.stride)
+        strip = Image.frombytes(self.mode, (self.width, y1 - y0), data, "raw", self.rawmode, self.stride, self.direction)
+        if self.palette is not None:
+            strip.putpalette(self.palette)
+        return strip
+
+    def close(self):
+        self.fp.close()
+
+STRIP_READERS = {b"\x89PNG": PngStripReader, b"II*\x00": TiffStripReader, b"MM\x00*": TiffStripReader,
+                 b"II+\x00": TiffStripReader, b"MM\x00+": TiffStripReader, b"BM": BmpStripReader}
+
+def open_strip_reader(path):
+    """根据文件头创建条带读取器（PNG、TIFF 或 BMP），不支持的格式抛出 ValueError"""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    for prefix, reader in STRIP_READERS.items():
+        if magic.startswith(prefix):
+            return reader(path)
+    raise ValueError("该格式不支持按条带读取，仅支持 PNG、TIFF 和 BMP")
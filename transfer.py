@@ -0,0 +1,192 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 复制、移动文件的并行传输引擎：小文件为主时耗时集中在每个文件的打开、创建等往返延迟上，
+# 多线程并发可以把这些延迟叠起来；同一设备上的移动直接重命名，跨设备复制优先使用
+# copy_file_range / sendfile 在内核中完成数据搬运，不经过用户态缓冲区。
+# 硬链接与 reflink（写时复制克隆）只新增目录项或共享数据块，同一卷上几乎不占时间和空间，
+# 跨设备或文件系统不支持时退回普通复制。
+
+COPY_WORKERS = 8
+COPY_BUFSIZE = 1 << 20
+# Linux 上的 FICLONE ioctl，btrfs、XFS（reflink=1）、bcachefs 等文件系统支持
+FICLONE = 0x40049409
+# 内核复制、硬链接或克隆不支持时返回的错误码，遇到这些错误改用下一种方式
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF, errno.EPERM, errno.ENOTTY}
+
+class _Unsupported(Exception):
+    pass
+
+def _copy_file_range(infd, outfd, size):
+    copied = 0
+    while True:
+        try:
+            n = os.copy_file_range(infd, outfd, max(size - copied, COPY_BUFSIZE))
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                raise _Unsupported from e
+            raise
+        if n == 0:
+            # 部分内核跨文件系统调用时直接返回 0 而不报错
+            if copied == 0 and size > 0:
+                raise _Unsupported
+            return copied
+        copied += n
+
+def _sendfile(infd, outfd, size):
+    copied = 0
+    while True:
+        try:
+            n = os.sendfile(outfd, infd, copied, max(size - copied, COPY_BUFSIZE))
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                raise _Unsupported from e
+            raise
+        if n == 0:
+            return copied
+        copied += n
+
+# (方式名称, 函数)，按优先级排列，当前平台不提供的方式不会列入。
+# macOS、BSD 上的 sendfile 只能写入套接字（返回 ENOTSOCK），只在 Linux 上用于文件间复制
+_KERNEL_COPIES = [(name, func) for name, func, available in (
+    ("copy_file_range", _copy_file_range, hasattr(os, "copy_file_range")),
+    ("sendfile", _sendfile, hasattr(os, "sendfile") and sys.platform.startswith("linux")),
+) if available]
+
+def copy_data(src, dst):
+    """复制文件内容，返回实际使用的方式。优先在内核中复制，都不支持时退回普通读写"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        for name, func in _KERNEL_COPIES:
+            try:
+                func(fsrc.fileno(), fdst.fileno(), size)
+                return name
+            except _Unsupported:
+                continue
+        shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)
+        return "普通复制"
+
+def copy_file(src, dst):
+    # 与 shutil.copy2 一样保留修改时间等元数据
+    method = copy_data(src, dst)
+    shutil.copystat(src, dst)
+    return method
+
+def _fallback_reason(e):
+    return "跨设备" if e.errno == errno.EXDEV else "文件系统不支持"
+
+def link_file(src, dst):
+    # 创建硬链接，目标已存在时先删除，与复制时覆盖目标的行为一致；
+    # 目标与源是同一个文件时绝不删除，否则删掉的就是源文件
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        if os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src} 与 {dst} 是同一个文件")
+        os.unlink(dst)
+        os.link(src, dst)
+
+def reflink_file(src, dst):
+    # 用 FICLONE 让目标与源共享数据块，之后任何一方被修改时才各自复制改动的块
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        raise OSError(errno.EOPNOTSUPP, "当前平台不支持 reflink")
+    # 以 wb 打开目标会截断文件，目标与源是同一个文件时会清空源文件
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src} 与 {dst} 是同一个文件")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+class DirCache:
+    """记录已创建的目标目录及其所在设备，每个目录只调用一次 os.makedirs 和 os.stat"""
+
+    def __init__(self):
+        self.devices = {}
+        self.lock = threading.Lock()
+
+    def ensure(self, directory):
+        dev = self.devices.get(directory)
+        if dev is None:
+            os.makedirs(directory, exist_ok=True)
+            dev = os.stat(directory).st_dev
+            with self.lock:
+                self.devices[directory] = dev
+        return dev
+
+# 硬链接、克隆模式下的首选方式
+_LINKERS = {"hardlink": ("硬链接", link_file), "reflink": ("reflink", reflink_file)}
+
+def transfer_one(src, dst, mode, dirs):
+    """按 mode（copy、move、hardlink、reflink）处理单个文件，返回 (方式, 字节数, 退回普通复制的原因或 None)。
+    移动时源和目标在同一设备上直接重命名，否则复制后删除源文件；
+    硬链接和克隆跨设备或不被支持时退回复制"""
+    st = os.stat(src)
+    dest_dev = dirs.ensure(os.path.dirname(dst) or ".")
+    try:
+        dst_st = os.stat(dst)
+    except FileNotFoundError:
+        dst_st = None
+    # 目标就是源文件（或其硬链接）时，打开目标写入或删除目标都会毁掉源文件的数据
+    if dst_st is not None and os.path.samestat(st, dst_st):
+        # 硬链接模式下目标已是源文件的另一个链接，视为已完成
+        if mode == "hardlink" and os.path.normcase(os.path.abspath(src)) != os.path.normcase(os.path.abspath(dst)):
+            return "硬链接", st.st_size, None
+        raise shutil.SameFileError(f"{src} 与 {dst} 是同一个文件")
+    reason = None
+    if mode == "move" and st.st_dev == dest_dev:
+        try:
+            os.replace(src, dst)
+            return "重命名", st.st_size, None
+        except OSError as e:
+            # 绑定挂载等情况下设备号相同但仍不能跨挂载点重命名
+            if e.errno != errno.EXDEV:
+                raise
+    elif mode in _LINKERS:
+        name, linker = _LINKERS[mode]
+        if st.st_dev != dest_dev:
+            reason = "跨设备"
+        else:
+            try:
+                linker(src, dst)
+                return name, st.st_size, None
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                reason = _fallback_reason(e)
+    method = copy_file(src, dst)
+    if mode == "move":
+        os.unlink(src)
+    return method, st.st_size, reason
+
+def transfer_files(pairs, mode="copy", workers=COPY_WORKERS):
+    """并行处理 pairs 中的 (源, 目标)，逐个产出 (源, 目标, 方式, 字节数, 退回原因, 异常或 None)。
+    pairs 可以是生成器，同时在途的任务数有上限，边扫描边传输时不会把整个文件列表读入内存"""
+    dirs = DirCache()
+    limit = max(1, workers) * 4
+
+    def run(src, dst):
+        try:
+            method, size, reason = transfer_one(src, dst, mode, dirs)
+            return src, dst, method, size, reason, None
+        except Exception as e:
+            return src, dst, None, 0, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = set()
+        for src, dst in pairs:
+            pending.add(pool.submit(run, src, dst))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in wait(pending).done:
+            yield future.result()
@@ -0,0 +1,238 @@
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 压缩为 ZIP 的写出引擎。zipfile 只能在写入线程中逐个压缩，这里改为：
+# 工作线程并行读取文件、计算 CRC 并压缩，写出线程按提交顺序依次写入条目；
+# JPEG/PNG/WebP 等本身已压缩的格式直接存储，不再白白消耗 CPU。
+# 条目或偏移超过 4 GB 时按 ZIP64 格式写出；可按大小上限拆分为多个独立的 ZIP 文件。
+
+# 已压缩格式，deflate 几乎没有收益，直接存储
+STORED_EXTS = {
+    ".jpg", ".jpeg", ".png", ".webp", ".gif", ".heic", ".heif", ".avif", ".jxl",
+    ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst",
+    ".mp3", ".aac", ".m4a", ".ogg", ".mp4", ".mov", ".mkv", ".webm", ".avi",
+}
+ZIP_WORKERS = min(32, os.cpu_count() or 1)
+DEFAULT_LEVEL = 6
+# 小于此大小的文件由工作线程整体读入并压缩；更大的文件由写出线程分块流式写入，避免占用过多内存
+PARALLEL_LIMIT = 8 << 20
+CHUNK_SIZE = 1 << 20
+
+ZIP_STORED, ZIP_DEFLATED = 0, 8
+ZIP64_LIMIT = (1 << 32) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END = struct.Struct("<IHHHHIIH")
+_END64 = struct.Struct("<IQHHIIQQQQ")
+_LOCATOR64 = struct.Struct("<IIQI")
+# 每个条目的 ZIP64 扩展字段最多占用的字节数（本地文件头 20，中央目录 28），以及结尾记录的最大字节数
+_LOCAL_EXTRA_MAX, _CENTRAL_EXTRA_MAX = 20, 28
+_END_MAX = _END.size + _END64.size + _LOCATOR64.size
+
+def compress_method(path):
+    # 按扩展名决定压缩方式
+    return ZIP_STORED if os.path.splitext(path)[1].lower() in STORED_EXTS else ZIP_DEFLATED
+
+def _dos_time(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0x21, 0  # 1980-01-01 00:00:00
+    date = (min(t.tm_year, 2107) - 1980) << 9 | t.tm_mon << 5 | t.tm_mday
+    return date, t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2
+
+class _Entry:
+    __slots__ = ("name", "flags", "method", "date", "time", "mode", "crc", "file_size", "compress_size", "offset", "zip64")
+
+    def __init__(self, arcname, method, st):
+        self.name = arcname.replace(os.sep, "/").encode("utf-8")
+        # 非 ASCII 文件名按 UTF-8 标记，解压时中文文件名不会乱码
+        self.flags = 0x800 if not arcname.isascii() else 0
+        self.method = method
+        self.date, self.time = _dos_time(st.st_mtime)
+        self.mode = st.st_mode & 0xFFFF
+        self.crc = self.compress_size = 0
+        self.file_size = st.st_size
+        self.offset = 0
+        # 压缩后可能略大于原文件，与 zipfile 一样留出余量
+        self.zip64 = st.st_size * 1.05 > ZIP64_LIMIT
+
+class ZipWriter:
+    """顺序写出的 ZIP 文件。add_data 写入已准备好的条目数据，add_stream 对大文件分块压缩写入，
+    写完后回填本地文件头中的 CRC 和大小"""
+
+    def __init__(self, path):
+        self.fp = open(path, "wb")
+        self.entries = []
+        # 已写入条目的中央目录最多占用的字节数
+        self.central_size = 0
+
+    def tell(self):
+        return self.fp.tell()
+
+    def size_after(self, arcname, data_size):
+        """再写入一个数据为 data_size 字节的条目并关闭后，文件最多有多大（含文件头、中央目录和结尾记录）"""
+        name_len = len(arcname.replace(os.sep, "/").encode("utf-8"))
+        entry_size = _LOCAL.size + _LOCAL_EXTRA_MAX + _CENTRAL.size + _CENTRAL_EXTRA_MAX + 2 * name_len
+        return self.fp.tell() + data_size + entry_size + self.central_size + _END_MAX
+
+    def _record(self, entry):
+        self.entries.append(entry)
+        self.central_size += _CENTRAL.size + _CENTRAL_EXTRA_MAX + len(entry.name)
+
+    def _local_header(self, entry):
+        extra = b""
+        csize, usize = entry.compress_size, entry.file_size
+        if entry.zip64:
+            extra = struct.pack("<HHQQ", 1, 16, usize, csize)
+            csize = usize = 0xFFFFFFFF
+        version = 45 if entry.zip64 else 20
+        return _LOCAL.pack(0x04034B50, version, entry.flags, entry.method, entry.time, entry.date,
+                           entry.crc, csize, usize, len(entry.name), len(extra)) + entry.name + extra
+
+    def add_data(self, arcname, st, method, crc, file_size, data):
+        entry = _Entry(arcname, method, st)
+        entry.crc, entry.file_size, entry.compress_size, entry.offset = crc, file_size, len(data), self.fp.tell()
+        self.fp.write(self._local_header(entry))
+        self.fp.write(data)
+        self._record(entry)
+        return entry
+
+    def add_stream(self, path, arcname, st, method, level=DEFAULT_LEVEL):
+        entry = _Entry(arcname, method, st)
+        entry.offset = self.fp.tell()
+        self.fp.write(self._local_header(entry))
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if method == ZIP_DEFLATED else None
+        crc = size = 0
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    if compressor:
+                        chunk = compressor.compress(chunk)
+                    self.fp.write(chunk)
+                if compressor:
+                    self.fp.write(compressor.flush())
+            end = self.fp.tell()
+            entry.crc, entry.file_size = crc, size
+            entry.compress_size = end - entry.offset - len(self._local_header(entry))
+            if not entry.zip64 and max(entry.file_size, entry.compress_size) > ZIP64_LIMIT:
+                raise ValueError(f"{arcname} 写入时大小超过 4 GB")
+        except Exception:
+            # 丢弃写了一半的条目，后续条目从其起始位置继续写
+            self.fp.seek(entry.offset)
+            self.fp.truncate()
+            raise
+        self.fp.seek(entry.offset)
+        self.fp.write(self._local_header(entry))
+        self.fp.seek(end)
+        self._record(entry)
+        return entry
+
+    def close(self):
+        start = self.fp.tell()
+        for entry in self.entries:
+            # ZIP64 扩展字段按 原始大小、压缩大小、偏移 的顺序只记录超出范围的值
+            fields = []
+            usize, csize, offset = entry.file_size, entry.compress_size, entry.offset
+            if usize > ZIP64_LIMIT or entry.zip64:
+                fields.append(usize)
+                usize = 0xFFFFFFFF
+            if csize > ZIP64_LIMIT or entry.zip64:
+                fields.append(csize)
+                csize = 0xFFFFFFFF
+            if offset > ZIP64_LIMIT:
+                fields.append(offset)
+                offset = 0xFFFFFFFF
+            extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+            version = 45 if fields else 20
+            self.fp.write(_CENTRAL.pack(0x02014B50, 3 << 8 | version, version, entry.flags, entry.method, entry.time, entry.date,
+                                        entry.crc, csize, usize, len(entry.name), len(extra), 0, 0, 0,
+                                        entry.mode << 16, offset) + entry.name + extra)
+        end = self.fp.tell()
+        count, size = len(self.entries), end - start
+        if count > ZIP_FILECOUNT_LIMIT or start > ZIP64_LIMIT or size > ZIP64_LIMIT:
+            self.fp.write(_END64.pack(0x06064B50, 44, 3 << 8 | 45, 45, 0, 0, count, count, size, start))
+            self.fp.write(_LOCATOR64.pack(0x07064B50, 0, end, 1))
+            count, size, start = min(count, 0xFFFF), min(size, 0xFFFFFFFF), min(start, 0xFFFFFFFF)
+        self.fp.write(_END.pack(0x06054B50, 0, 0, count, count, size, start, 0))
+        self.fp.close()
+
+def prepare_entry(path, level=DEFAULT_LEVEL):
+    """在工作线程中读取并压缩小文件，返回 (stat, 方式, CRC, 原始大小, 数据)；大文件只返回 stat 和方式，其余为 None。
+    deflate 后没有变小的文件改为存储"""
+    st = os.stat(path)
+    method = compress_method(path)
+    if st.st_size > PARALLEL_LIMIT:
+        return st, method, None, None, None
+    with open(path, "rb") as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    if method == ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        packed = compressor.compress(data) + compressor.flush()
+        if len(packed) < len(data):
+            return st, method, crc, len(data), packed
+        method = ZIP_STORED
+    return st, method, crc, len(data), data
+
+def volume_path(output, index):
+    # 拆分后的分卷为各自独立的 ZIP：name.zip、name_part2.zip、name_part3.zip ...
+    if index == 1:
+        return output
+    stem, ext = os.path.splitext(output)
+    return f"{stem}_part{index}{ext or '.zip'}"
+
+def write_zip(items, output, level=DEFAULT_LEVEL, workers=ZIP_WORKERS, volume_size=None, volumes=None):
+    """把 items 中的 (文件路径, 压缩包内名称) 写入 output，逐个产出 (压缩包内名称, 方式, 原始大小, 写入大小, 异常或 None)。
+    工作线程按提交顺序并行准备条目，写出顺序与 items 一致；volume_size 为每个分卷的字节数上限，
+    超过时新开一个 ZIP，单个文件超过上限时单独成卷。volumes 列表用于记录实际写出的各分卷路径"""
+    volumes = [] if volumes is None else volumes
+    volumes.append(output)
+    writer = ZipWriter(output)
+    pending = deque()
+    limit = max(1, workers) * 2
+
+    def write(path, arcname, future):
+        nonlocal writer
+        st, method, crc, file_size, data = future.result()
+        if data is not None:
+            estimate = len(data)
+        else:
+            # 流式写入的大文件按 deflate 最坏情况（不可压缩数据略有膨胀）估算
+            size = st.st_size
+            estimate = size + (size >> 12) + (size >> 14) + (size >> 25) + 13 if method == ZIP_DEFLATED else size
+        if volume_size and writer.entries and writer.size_after(arcname, estimate) > volume_size:
+            writer.close()
+            volumes.append(volume_path(output, len(volumes) + 1))
+            writer = ZipWriter(volumes[-1])
+        if data is None:
+            entry = writer.add_stream(path, arcname, st, method, level)
+        else:
+            entry = writer.add_data(arcname, st, method, crc, file_size, data)
+        return arcname, entry.method, entry.file_size, entry.compress_size, None
+
+    def finish(path, arcname, future):
+        try:
+            return write(path, arcname, future)
+        except Exception as e:
+            return arcname, None, 0, 0, e
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for path, arcname in items:
+                pending.append((path, arcname, pool.submit(prepare_entry, path, level)))
+                if len(pending) >= limit:
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+    finally:
+        writer.close()